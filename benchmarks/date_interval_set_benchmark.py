@@ -0,0 +1,90 @@
+"""Compare DateIntervalSet against the original list-resorting implementation.
+
+Run from the repository root:
+
+    python -m benchmarks.date_interval_set_benchmark [count ...]
+"""
+
+import sys
+from timeit import timeit
+
+from benchmarks.generators import random_intervals
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+
+
+class LegacyDateIntervalSet:
+    # the implementation DateIntervalSet replaced, kept here as a baseline
+    def __init__(self, intervals=None):
+        self.intervals = []
+        for interval in intervals or []:
+            self.add(interval)
+
+    def add(self, new_interval):
+        self.intervals.append(new_interval)
+        self.intervals.sort(key=lambda interval: interval.start)
+        merged_intervals = []
+        current = self.intervals[0]
+        for interval in self.intervals[1:]:
+            if current.end >= interval.start:
+                current = DateInterval(current.start, max(current.end, interval.end))
+            else:
+                merged_intervals.append(current)
+                current = interval
+        merged_intervals.append(current)
+        self.intervals = merged_intervals
+
+    def extend(self, interval_set):
+        for interval in interval_set.intervals:
+            self.add(interval)
+
+
+def bench(label, func, repeat):
+    seconds = timeit(func, number=repeat) / repeat
+    print(f"  {label:<32}{seconds * 1000:>12.3f} ms")
+    return seconds
+
+
+def run(count):
+    intervals = random_intervals(count)
+    half = count // 2
+    first, second = intervals[:half], intervals[half:]
+    repeat = max(1, 2000 // count)
+    print(f"{count} intervals")
+
+    def build_incremental(cls):
+        interval_set = cls()
+        for interval in intervals:
+            interval_set.add(interval)
+
+    legacy = bench(
+        "legacy add loop", lambda: build_incremental(LegacyDateIntervalSet), repeat
+    )
+    current = bench("add loop", lambda: build_incremental(DateIntervalSet), repeat)
+    print(f"  {'speedup':<32}{legacy / current:>12.1f} x")
+
+    bench("legacy constructor", lambda: LegacyDateIntervalSet(intervals), repeat)
+    bench("constructor", lambda: DateIntervalSet(intervals), repeat)
+
+    legacy_a, legacy_b = LegacyDateIntervalSet(first), LegacyDateIntervalSet(second)
+    set_a, set_b = DateIntervalSet(first), DateIntervalSet(second)
+    bench(
+        "legacy extend",
+        lambda: LegacyDateIntervalSet(legacy_a.intervals).extend(legacy_b),
+        repeat,
+    )
+    bench("extend", lambda: set_a.copy().extend(set_b), repeat)
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv] or [100, 1000, 5000]
+    for count in counts:
+        run(count)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
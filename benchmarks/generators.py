@@ -0,0 +1,85 @@
+"""Seeded generators for synthetic outage calendars and print job queues."""
+
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+ICAL_DATETIME_FORMAT = "%Y%m%dT%H%M%S"
+
+_RULES = [
+    "FREQ=DAILY",
+    "FREQ=DAILY;INTERVAL=2",
+    "FREQ=WEEKLY",
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "FREQ=HOURLY;INTERVAL=12",
+]
+
+
+def _vevent(start, end, extra=""):
+    return (
+        "BEGIN:VEVENT\r\n"
+        f"DTSTART:{start.strftime(ICAL_DATETIME_FORMAT)}\r\n"
+        f"DTEND:{end.strftime(ICAL_DATETIME_FORMAT)}\r\n"
+        f"{extra}"
+        "END:VEVENT\r\n"
+    )
+
+
+def write_calendar(
+    path: Path,
+    rules: int,
+    outages: int,
+    years: float = 1.0,
+    end: datetime = datetime(2024, 7, 1),
+    seed: int = 0,
+):
+    """Calendar with ``rules`` recurring outages and ``outages`` single ones.
+
+    Single outages are spread over ``years`` of history before ``end`` and
+    the recurring ones start at the beginning of that history.
+    """
+    rng = random.Random(seed)
+    history_start = end - timedelta(days=365 * years)
+    history_minutes = int((end - history_start).total_seconds() // 60)
+    with open(path, "w", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        for index in range(rules):
+            start = history_start + timedelta(
+                hours=rng.randrange(24), minutes=15 * rng.randrange(4)
+            )
+            duration = timedelta(minutes=30 * rng.randrange(1, 8))
+            rule = _RULES[index % len(_RULES)]
+            f.write(_vevent(start, start + duration, f"RRULE:{rule}\r\n"))
+        for _ in range(outages):
+            start = history_start + timedelta(minutes=rng.randrange(history_minutes))
+            duration = timedelta(minutes=rng.randrange(15, 240))
+            f.write(_vevent(start, start + duration))
+        f.write("END:VCALENDAR\r\n")
+
+
+def random_intervals(count, origin=datetime(2024, 1, 1), seed=0):
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        start = origin + timedelta(minutes=rng.randrange(count * 120))
+        result.append(
+            DateInterval(start, start + timedelta(minutes=rng.randrange(5, 90)))
+        )
+    return result
+
+
+def job_queue(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        PrintJob(
+            f"job {index}",
+            timedelta(minutes=rng.randrange(10, 600)),
+            priority=rng.randrange(1, 4),
+        )
+        for index in range(count)
+    ]
@@ -0,0 +1,82 @@
+"""Compare the full icalendar parser with the streaming VEVENT parser.
+
+Run from the repository root:
+
+    python -m benchmarks.ics_parse_benchmark [event count ...]
+"""
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+)
+
+ICAL_DATETIME_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def write_history_calendar(path: Path, count: int):
+    # `count` past outages of two hours each, followed by a few rules
+    start = datetime(2020, 1, 1, 8, 0)
+    with open(path, "w", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        for index in range(count):
+            outage_start = start + timedelta(hours=7 * index)
+            outage_end = outage_start + timedelta(hours=2)
+            f.write(
+                "BEGIN:VEVENT\r\n"
+                f"UID:outage-{index}@example.com\r\n"
+                "SUMMARY:Scheduled outage for queue 3\\, sector 12\r\n"
+                f"DTSTART:{outage_start.strftime(ICAL_DATETIME_FORMAT)}\r\n"
+                f"DTEND:{outage_end.strftime(ICAL_DATETIME_FORMAT)}\r\n"
+                "END:VEVENT\r\n"
+            )
+        for hour in (6, 14, 22):
+            f.write(
+                "BEGIN:VEVENT\r\n"
+                f"DTSTART:20240101T{hour:02d}0000\r\n"
+                f"DTEND:20240101T{hour + 1:02d}0000\r\n"
+                "RRULE:FREQ=DAILY;INTERVAL=2\r\n"
+                "END:VEVENT\r\n"
+            )
+        f.write("END:VCALENDAR\r\n")
+
+
+def measure(label, func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    calendar = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"  {label:<28}{elapsed * 1000:>10.1f} ms"
+        f"{peak / 2**20:>10.1f} MiB peak{len(calendar.events):>8} events"
+    )
+
+
+def run(count, folder: Path):
+    path = folder / f"history-{count}.ics"
+    write_history_calendar(path, count)
+    print(f"{count} events, {path.stat().st_size / 2**20:.1f} MiB")
+    measure("from_file", lambda: InfiniteCalendar.from_file(path))
+    measure("from_stream", lambda: InfiniteCalendar.from_stream(path))
+    measure(
+        "from_stream with cutoff",
+        lambda: InfiniteCalendar.from_stream(path, ended_before=datetime(2024, 1, 1)),
+    )
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv] or [1000, 10000, 50000]
+    with tempfile.TemporaryDirectory() as folder:
+        for count in counts:
+            run(count, Path(folder))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,195 @@
+"""Time and peak memory of the planning hot paths on synthetic inputs.
+
+Run from the repository root:
+
+    python -m benchmarks.scheduler_benchmark [--scale N] [--repeat N] [--json FILE]
+        [--compare FILE [--max-regression RATIO]]
+
+Every input comes from the seeded generators in ``benchmarks.generators``
+so runs on different commits measure the same work. ``--json`` writes the
+results, ``--compare`` prints the change against such a file and
+``--max-regression`` makes the run fail when a case got slower than that.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.generators import job_queue, random_intervals, write_calendar
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    BEST_FIT,
+    FIRST_FIT,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_schedule import (
+    PrintSchedule,
+)
+
+NOW = datetime(2024, 7, 1)
+
+
+def measure(func, repeat, setup=None):
+    # time is the median of `repeat` runs, memory is traced in a separate run
+    # because tracemalloc slows the code down; `setup` builds fresh state for
+    # cases that change it and is not timed
+    def run():
+        if setup is None:
+            return func
+        state = setup()
+        return lambda: func(state)
+
+    times = []
+    for _ in range(repeat):
+        call = run()
+        started = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - started)
+    call = run()
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def interval_set_cases(scale):
+    count = 5000 * scale
+    intervals = random_intervals(count)
+    other = DateIntervalSet(random_intervals(count, seed=1))
+    built = DateIntervalSet(intervals)
+    cuts = random_intervals(count // 10, seed=2)
+
+    def add_each():
+        interval_set = DateIntervalSet()
+        for interval in intervals:
+            interval_set.add(interval)
+
+    def remove_each():
+        interval_set = built.copy()
+        for interval in cuts:
+            interval_set.remove_interval(interval)
+
+    yield f"DateIntervalSet build {count}", lambda: DateIntervalSet(intervals)
+    yield f"DateIntervalSet add {count}", add_each
+    yield f"DateIntervalSet union {count}", lambda: built.union(other)
+    yield f"DateIntervalSet difference {count}", lambda: built.difference(other)
+    yield f"DateIntervalSet remove {len(cuts)}", remove_each
+
+
+def calendar_cases(folder, scale):
+    rules, outages, years = 20 * scale, 2000 * scale, 3
+    path = folder / "synthetic.ics"
+    write_calendar(path, rules, outages, years=years, end=NOW)
+    calendar = InfiniteCalendar.from_file(path)
+    label = f"{rules} rules {outages} outages"
+
+    yield f"from_file {label}", lambda: InfiniteCalendar.from_file(path)
+    yield f"from_stream {label}", lambda: InfiniteCalendar.from_stream(path)
+    month = DateInterval(NOW, NOW + timedelta(days=30))
+    history = DateInterval(NOW - timedelta(days=365 * years), NOW)
+
+    def expand(period):
+        calendar.expansion_cache.clear()
+        calendar.generate_intervals_for_period(period)
+
+    yield f"expand 30 days {label}", lambda: expand(month)
+    yield f"expand {years} years {label}", lambda: expand(history)
+    yield f"cached 30 days {label}", lambda: calendar.generate_intervals_for_period(
+        month
+    )
+
+
+def schedule_cases(folder, scale):
+    path = folder / "schedule.ics"
+    write_calendar(path, 5 * scale, 200 * scale, end=NOW + timedelta(days=60))
+    schedule = PrintSchedule(path, horizon=timedelta(days=60))
+    schedule.calculate_power_intervals(NOW)
+    count = 200 * scale
+    schedule.jobs = job_queue(count)
+    events = schedule.calendar.events
+
+    def fresh_schedule():
+        # urgent outages are added to the calendar, every run needs its own
+        fresh = PrintSchedule(
+            None,
+            horizon=timedelta(days=60),
+            calendar=InfiniteCalendar(list(events)),
+        )
+        fresh.calculate_power_intervals(NOW)
+        return fresh
+
+    def add_outages(fresh):
+        for hour in range(count):
+            start = NOW + timedelta(hours=hour)
+            fresh.add_urgent_outage(start, start + timedelta(minutes=30))
+
+    yield f"schedule_jobs first fit {count}", lambda: schedule.schedule_jobs(FIRST_FIT)
+    yield f"schedule_jobs best fit {count}", lambda: schedule.schedule_jobs(BEST_FIT)
+    yield f"add_urgent_outage {count}", add_outages, fresh_schedule
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="fail when a case is slower than the --compare run by this ratio",
+    )
+    args = parser.parse_args(argv)
+    baseline = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        folder = Path(folder)
+        cases = [
+            *interval_set_cases(args.scale),
+            *calendar_cases(folder, args.scale),
+            *schedule_cases(folder, args.scale),
+        ]
+        regressions = []
+        for label, func, *setup in cases:
+            elapsed, peak = measure(func, args.repeat, *setup)
+            results[label] = {"seconds": elapsed, "peak_bytes": peak}
+            line = (
+                f"  {label:<48}{elapsed * 1000:>10.2f} ms{peak / 2**20:>10.2f} MiB peak"
+            )
+            if label in baseline:
+                ratio = elapsed / baseline[label]["seconds"]
+                line += f"{ratio:>8.2f}x"
+                if args.max_regression is not None and ratio > args.max_regression:
+                    regressions.append(label)
+            print(line)
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        print(f"{len(regressions)} cases slower than {args.max_regression}x:")
+        for label in regressions:
+            print(f"  {label}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,497 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import flask
 import octoprint.plugin
+from octoprint.events import Events
+
+from octoprint_print_planning_scheduler.printing_schedule.calendar_cache import (
+    CalendarCache,
+)
+from octoprint_print_planning_scheduler.printing_schedule.calendar_subscription import (
+    CalendarSubscription,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+    to_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.deadline_dispatcher import (
+    DeadlineDispatcher,
+)
+from octoprint_print_planning_scheduler.printing_schedule.file_jobs import (
+    EstimateStore,
+    job_from_file,
+)
+from octoprint_print_planning_scheduler.printing_schedule.incremental_planner import (
+    IncrementalPlanner,
+)
+from octoprint_print_planning_scheduler.printing_schedule.instrumentation import (
+    metrics,
+    profile_call,
+)
+from octoprint_print_planning_scheduler.printing_schedule.message_batcher import (
+    MessageBatcher,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_api import (
+    PlanHistory,
+    ScheduleSnapshot,
+    availability,
+    etag,
+    merge_plan_messages,
+    next_outage,
+    parse_version,
+    plan_delta,
+    plan_to_dict,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_journal import (
+    PlanJournal,
+)
+from octoprint_print_planning_scheduler.printing_schedule.planning_worker import (
+    PlanningWorker,
+    PublishedPlan,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_dispatcher import (
+    PrintDispatcher,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+from octoprint_print_planning_scheduler.printing_schedule.print_schedule import (
+    PrintSchedule,
+)
+from octoprint_print_planning_scheduler.printing_schedule.rolling_horizon import (
+    HorizonTimer,
+)
 
 
 class PrintPlanningSchedulerPlugin(
+    octoprint.plugin.StartupPlugin,
+    octoprint.plugin.ShutdownPlugin,
     octoprint.plugin.SettingsPlugin,
     octoprint.plugin.AssetPlugin,
     octoprint.plugin.TemplatePlugin,
+    octoprint.plugin.BlueprintPlugin,
+    octoprint.plugin.EventHandlerPlugin,
 ):
+    def initialize(self):
+        # parsed calendars survive restarts as snapshots in the data folder
+        self.calendar_cache = CalendarCache(
+            Path(self.get_plugin_data_folder()) / "calendar_cache"
+        )
+        # G-code estimates by file hash, files are only estimated once
+        self._estimates = EstimateStore(
+            Path(self.get_plugin_data_folder()) / "estimates.json"
+        )
+        self._estimating = ThreadPoolExecutor(max_workers=1)
+        # the schedule is only touched under this lock, planning holds it
+        self._schedule_lock = threading.RLock()
+        self._schedule: PrintSchedule | None = None
+        self._reload_schedule = True
+        # queue changes patch this plan, only a new calendar plans from scratch
+        self._planner: IncrementalPlanner | None = None
+        # planner job ids by id() of the queued or running PrintJob
+        self._planned: dict[int, tuple[PrintJob, int]] = {}
+        self._started_id: int | None = None
+        # a calendar URL is fetched in the background, planning never waits on it
+        self._subscription = self._make_subscription()
+        self._history = PlanHistory()
+        # clients get pushed deltas instead of polling /plan
+        self._messages = MessageBatcher(
+            lambda data: self._plugin_manager.send_plugin_message(
+                self._identifier, data
+            ),
+            self._settings.get_float(["push_interval_seconds"]),
+            merge={"plan": merge_plan_messages},
+        )
+        self._pushed_outage = None
+        self._worker = PlanningWorker(
+            self._plan,
+            debounce=self._settings.get_float(["replan_debounce_seconds"]),
+            on_publish=self._on_plan_published,
+        )
+        self._horizon_timer: HorizonTimer | None = None
+        # queue, urgent outages and the last plan survive restarts
+        self._journal = PlanJournal(
+            Path(self.get_plugin_data_folder()) / "journal.jsonl"
+        )
+        self._outages = self._journal.outages
+        self._applied_outages = 0
+        # set through the API, the next planning run is profiled once
+        self._profile_next_plan = False
+        self._last_profile: Path | None = None
+        # one sleeping thread for planned starts and pauses before outages
+        self._deadlines = DeadlineDispatcher()
+        self._dispatcher = PrintDispatcher(
+            self._deadlines,
+            is_ready=self._printer.is_ready,
+            start_print=self._start_print,
+            pause_print=self._pause_print,
+            on_change=self.request_replan,
+            pause_margin=timedelta(
+                seconds=self._settings.get_float(["pause_margin_seconds"])
+            ),
+            journal=self._journal,
+        )
+
+    def request_replan(self):
+        """Ask the planning worker for a new plan, safe to call from any thread."""
+        self._worker.request()
+
+    def get_latest_plan(self) -> PublishedPlan[ScheduleSnapshot] | None:
+        return self._worker.latest
+
+    def add_urgent_outage(self, start: datetime, end: datetime):
+        """Cut an outage that is not in the calendar out of the plan."""
+        outage = DateInterval(start, end)
+        self._journal.outage_added(outage)
+        with self._schedule_lock:
+            self._outages.append(outage)
+        self.request_replan()
+
+    def enqueue_file(
+        self, path: str, priority: int = 1, deadline: datetime | None = None
+    ):
+        """Queue a file of the local storage, its duration is found in the background."""
+        self._estimating.submit(self._enqueue_file, path, priority, deadline)
+
+    def _enqueue_file(self, path: str, priority: int, deadline: datetime | None):
+        try:
+            job = job_from_file(
+                self._file_manager, path, self._estimates, "local", priority, deadline
+            )
+        except Exception:
+            self._logger.exception(f"Could not estimate print time of {path}")
+            return
+        self._dispatcher.enqueue(job)
+
+    def _start_print(self, job: PrintJob):
+        self._logger.info(f"Starting planned print {job.name}")
+        self._printer.select_file(job.path, False, printAfterSelect=True)
+
+    def _pause_print(self):
+        self._logger.info("Pausing print before the next power outage")
+        self._printer.pause_print()
+
+    def _on_plan_published(self, published: PublishedPlan[ScheduleSnapshot]):
+        previous = self._history.latest
+        self._history.publish(published)
+        self._journal.plan_published(published.plan)
+        self._dispatcher.plan_published(published.plan)
+        if previous is not None:
+            self._messages.push("plan", plan_delta(previous, published))
+        else:
+            self._messages.push("plan", plan_to_dict(published))
+        outage = next_outage(published.plan, datetime.now())
+        if outage != self._pushed_outage:
+            self._pushed_outage = outage
+            self._messages.push("outage", {"outage": outage})
+
+    def _plan(self) -> ScheduleSnapshot:
+        # runs on the planning worker thread only
+        if self._profile_next_plan:
+            self._profile_next_plan = False
+            snapshot, self._last_profile = profile_call(
+                self._plan_schedule, Path(self.get_plugin_data_folder()) / "profiles"
+            )
+            self._logger.info(
+                f"Saved profile of a planning run to {self._last_profile}"
+            )
+            return snapshot
+        return self._plan_schedule()
+
+    @metrics.timed("plugin.plan")
+    def _plan_schedule(self) -> ScheduleSnapshot:
+        with self._schedule_lock:
+            now = datetime.now()
+            self._update_schedule(now)
+            if self._schedule is None:
+                return ScheduleSnapshot()
+            self._sync_planner(now)
+            result = self._planner.result()
+            running = self._dispatcher.running
+            if running is not None:
+                # the running print only holds its time, it is not planned
+                result.placements = [
+                    p for p in result.placements if p.job is not running
+                ]
+            metrics.count("jobs_placed", len(result.placements))
+            metrics.count("jobs_unscheduled", len(result.unscheduled))
+            return ScheduleSnapshot(
+                result,
+                self._schedule.power_intervals.copy(),
+                self._schedule.horizon.end,
+            )
+
+    def _update_schedule(self, now: datetime):
+        # callers hold the schedule lock
+        added = DateIntervalSet()
+        if self._reload_schedule:
+            self._reload_schedule = False
+            self._schedule = self._load_schedule()
+            self._planner = None
+            # outages that ended are not added to the new calendar again
+            self._outages = [o for o in self._outages if to_key(o.end) > to_key(now)]
+            self._applied_outages = 0
+        elif self._schedule is not None:
+            added = self._schedule.advance_horizon(now)
+        if self._schedule is None:
+            return
+        outages = self._outages[self._applied_outages :]
+        for outage in outages:
+            self._schedule.add_urgent_outage(outage.start, outage.end)
+        self._applied_outages = len(self._outages)
+        if self._planner is None:
+            self._planner = IncrementalPlanner(self._schedule.power_intervals, now=now)
+            self._planned = {}
+            self._started_id = None
+            return
+        self._planner.advance(now, added)
+        for outage in outages:
+            self._planner.add_outage(outage.start, outage.end)
+
+    def _sync_planner(self, now: datetime):
+        """Hand the changes of the queue and the running print to the planner."""
+        running = self._dispatcher.running
+        jobs = self._dispatcher.queued_jobs()
+        if running is not None:
+            jobs.append(running)
+        current = {id(job) for job in jobs}
+        for key, (job, job_id) in list(self._planned.items()):
+            if key in current:
+                continue
+            del self._planned[key]
+            if job_id == self._started_id:
+                self._planner.job_finished(job_id, now, now)
+                self._started_id = None
+            else:
+                self._planner.cancel_job(job_id, now)
+        for job in jobs:
+            if id(job) not in self._planned:
+                self._planned[id(job)] = (job, self._planner.add_job(job))
+        if running is not None:
+            job_id = self._planned[id(running)][1]
+            if job_id != self._started_id:
+                start = self._dispatcher.running_until - running.duration
+                self._planner.job_started(job_id, start, now)
+                self._started_id = job_id
+
+    def _load_schedule(self) -> PrintSchedule | None:
+        horizon = timedelta(hours=self._settings.get_float(["horizon_hours"]))
+        if self._subscription is not None:
+            calendar = self._subscription.calendar()
+            if calendar is None:
+                return None
+            return PrintSchedule(None, horizon=horizon, calendar=calendar)
+        calendar_file = self._settings.get(["calendar_file"])
+        if not calendar_file:
+            return None
+        schedule = PrintSchedule(calendar_file, self.calendar_cache, horizon)
+        return schedule
+
+    def _make_subscription(self) -> CalendarSubscription | None:
+        url = self._settings.get(["calendar_url"])
+        if not url:
+            return None
+        # every URL gets its own cache, a replaced subscription cannot touch it
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return CalendarSubscription(
+            url,
+            Path(self.get_plugin_data_folder()) / "subscription" / f"{name}.ics",
+            self.calendar_cache,
+            refresh_interval=self._settings.get_float(["calendar_refresh_minutes"])
+            * 60,
+            on_update=self._calendar_updated,
+        )
+
+    def _calendar_updated(self):
+        self._reload_schedule = True
+        self.request_replan()
+
+    ##~~ StartupPlugin mixin
+
+    def on_after_startup(self):
+        # the stored plan is served and followed until the first new one is made,
+        # its power windows are not stored but taken from the calendar
+        with self._schedule_lock:
+            self._update_schedule(datetime.now())
+            schedule = self._schedule
+        if schedule is not None:
+            restored = self._journal.snapshot(
+                schedule.power_intervals.copy(), schedule.horizon.end
+            )
+        else:
+            restored = self._journal.snapshot()
+        if restored is not None:
+            self._worker.publish(restored)
+        self._worker.start()
+        if self._subscription is not None:
+            self._subscription.start()
+        self._deadlines.start()
+        self._horizon_timer = HorizonTimer(
+            self.request_replan,
+            self._settings.get_float(["horizon_step_seconds"]),
+        )
+        self._horizon_timer.start()
+        self.request_replan()
+
+    ##~~ ShutdownPlugin mixin
+
+    def on_shutdown(self):
+        if self._horizon_timer is not None:
+            self._horizon_timer.stop()
+        if self._subscription is not None:
+            self._subscription.stop()
+        self._worker.stop()
+        self._deadlines.stop()
+        self._estimating.shutdown(wait=False, cancel_futures=True)
+        self._messages.cancel()
+        self._journal.close()
+
+    ##~~ EventHandlerPlugin mixin
+
+    def on_event(self, event, payload):
+        if event == Events.PRINT_STARTED:
+            self._dispatcher.print_started(payload.get("path"), datetime.now())
+        elif event in (Events.PRINT_DONE, Events.PRINT_FAILED, Events.PRINT_CANCELLED):
+            self._dispatcher.print_finished()
 
     ##~~ SettingsPlugin mixin
 
     def get_settings_defaults(self):
         return {
-            # put your plugin's default settings here
+            "calendar_file": None,
+            # takes the place of calendar_file when set
+            "calendar_url": None,
+            "calendar_refresh_minutes": 15,
+            "horizon_hours": 24,
+            "horizon_step_seconds": 60,
+            "replan_debounce_seconds": 0.5,
+            "push_interval_seconds": 1.0,
+            "pause_margin_seconds": 60,
         }
 
+    def on_settings_save(self, data):
+        subscribed = (
+            self._settings.get(["calendar_url"]),
+            self._settings.get_float(["calendar_refresh_minutes"]),
+        )
+        octoprint.plugin.SettingsPlugin.on_settings_save(self, data)
+        if subscribed != (
+            self._settings.get(["calendar_url"]),
+            self._settings.get_float(["calendar_refresh_minutes"]),
+        ):
+            if self._subscription is not None:
+                # an old fetch still in flight is dropped by the subscription
+                self._subscription.stop(timeout=0)
+            self._subscription = self._make_subscription()
+            if self._subscription is not None:
+                self._subscription.start()
+        # the calendar or horizon may have changed, rebuild on the next plan
+        # without waiting for a planning run that holds the schedule lock
+        self._reload_schedule = True
+        self.request_replan()
+
+    ##~~ BlueprintPlugin mixin
+
+    def is_blueprint_csrf_protected(self):
+        # the POST routes change the queue, outages and profiling
+        return True
+
+    @octoprint.plugin.BlueprintPlugin.route("/plan", methods=["GET"])
+    def get_plan(self):
+        published = self._worker.latest
+        if published is None:
+            return flask.make_response("No plan has been made yet", 503)
+        if flask.request.if_none_match.contains(etag(published)):
+            response = flask.make_response("", 304)
+        else:
+            # a since from before a restart gets the full plan
+            since = parse_version(flask.request.args.get("since"))
+            previous = self._history.get(since) if since is not None else None
+            if previous is not None:
+                response = flask.jsonify(plan_delta(previous, published))
+            else:
+                response = flask.jsonify(plan_to_dict(published))
+        response.set_etag(etag(published))
+        return response
+
+    @octoprint.plugin.BlueprintPlugin.route("/jobs", methods=["POST"])
+    def post_job(self):
+        data = flask.request.get_json(silent=True) or {}
+        path = data.get("path")
+        if not path or not self._file_manager.file_exists("local", path):
+            flask.abort(400, description="path must name a file in local storage")
+        deadline = data.get("deadline")
+        try:
+            deadline = datetime.fromisoformat(deadline) if deadline else None
+            priority = int(data.get("priority", 1))
+        except (TypeError, ValueError):
+            flask.abort(400, description="invalid priority or deadline")
+        self.enqueue_file(path, priority, deadline)
+        return flask.make_response("", 202)
+
+    @octoprint.plugin.BlueprintPlugin.route("/outages", methods=["POST"])
+    def post_outage(self):
+        data = flask.request.get_json(silent=True) or {}
+        try:
+            start = datetime.fromisoformat(data["start"])
+            end = datetime.fromisoformat(data["end"])
+        except (KeyError, TypeError, ValueError):
+            flask.abort(400, description="start and end must be ISO 8601 datetimes")
+        if end <= start:
+            flask.abort(400, description="end must be after start")
+        self.add_urgent_outage(start, end)
+        return flask.make_response("", 202)
+
+    @octoprint.plugin.BlueprintPlugin.route("/availability", methods=["GET"])
+    def get_availability(self):
+        snapshot = self._latest_snapshot()
+        start = self._datetime_arg("start")
+        end = self._datetime_arg("end")
+        return flask.jsonify({"windows": availability(snapshot, start, end)})
+
+    @octoprint.plugin.BlueprintPlugin.route("/next_outage", methods=["GET"])
+    def get_next_outage(self):
+        snapshot = self._latest_snapshot()
+        now = self._datetime_arg("now") or datetime.now()
+        return flask.jsonify({"outage": next_outage(snapshot, now)})
+
+    @octoprint.plugin.BlueprintPlugin.route("/metrics", methods=["GET"])
+    def get_metrics(self):
+        return flask.jsonify(
+            {
+                **metrics.snapshot(),
+                "planning_runs": self._worker.runs,
+                "last_profile": self._last_profile.name if self._last_profile else None,
+            }
+        )
+
+    @octoprint.plugin.BlueprintPlugin.route("/profile", methods=["POST"])
+    def post_profile(self):
+        self._profile_next_plan = True
+        self.request_replan()
+        return flask.make_response("", 202)
+
+    def _latest_snapshot(self) -> ScheduleSnapshot:
+        published = self._worker.latest
+        return published.plan if published is not None else ScheduleSnapshot()
+
+    @staticmethod
+    def _datetime_arg(name: str) -> datetime | None:
+        value = flask.request.args.get(name)
+        if value is None:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            flask.abort(400, description=f"{name} is not an ISO 8601 datetime")
+
     ##~~ AssetPlugin mixin
 
     def get_assets(self):
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    RecurringEvent,
+    SingleEvent,
+    parse_events,
+)
+from octoprint_print_planning_scheduler.printing_schedule.instrumentation import (
+    metrics,
+)
+
+# bump when the pickled event classes change shape
+SNAPSHOT_FORMAT = 3
+
+
+@dataclass
+class _CacheEntry:
+    mtime_ns: int
+    size: int
+    digest: str
+    events: list[SingleEvent | RecurringEvent]
+
+
+class CalendarCache:
+    """Parsed .ics events keyed by path, modification time and content hash.
+
+    A file is only re-read when its mtime or size changed, and only re-parsed
+    when its content hash changed too. With a ``snapshot_folder`` the parsed
+    events are also pickled to disk so a restart can skip iCalendar parsing.
+    """
+
+    def __init__(self, snapshot_folder: Path | None = None):
+        self.snapshot_folder = Path(snapshot_folder) if snapshot_folder else None
+        self.parses = 0
+        self._entries: dict[str, _CacheEntry] = {}
+
+    def load(self, file_path: Path) -> list[SingleEvent | RecurringEvent]:
+        key = str(Path(file_path).resolve())
+        stat = os.stat(key)
+        entry = self._entries.get(key) or self._read_snapshot(key)
+        if (
+            entry is not None
+            and entry.mtime_ns == stat.st_mtime_ns
+            and entry.size == stat.st_size
+        ):
+            self._entries[key] = entry
+            metrics.count("calendar_cache_hits")
+            return entry.events
+
+        with open(key, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is None or entry.digest != digest:
+            self.parses += 1
+            metrics.count("calendar_parses")
+            entry = _CacheEntry(0, 0, digest, parse_events(data))
+        entry.mtime_ns = stat.st_mtime_ns
+        entry.size = stat.st_size
+        self._entries[key] = entry
+        self._write_snapshot(key, entry)
+        return entry.events
+
+    def invalidate(self, file_path: Path):
+        key = str(Path(file_path).resolve())
+        self._entries.pop(key, None)
+        snapshot = self._snapshot_path(key)
+        if snapshot is not None and snapshot.exists():
+            snapshot.unlink()
+
+    def _snapshot_path(self, key: str) -> Path | None:
+        if self.snapshot_folder is None:
+            return None
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.snapshot_folder / f"{name}.pickle"
+
+    def _read_snapshot(self, key: str) -> _CacheEntry | None:
+        snapshot = self._snapshot_path(key)
+        if snapshot is None or not snapshot.exists():
+            return None
+        try:
+            with open(snapshot, "rb") as f:
+                data = pickle.load(f)
+        except Exception:
+            # a broken snapshot only costs one parse
+            return None
+        if data.get("format") != SNAPSHOT_FORMAT or data.get("path") != key:
+            return None
+        return data["entry"]
+
+    def _write_snapshot(self, key: str, entry: _CacheEntry):
+        snapshot = self._snapshot_path(key)
+        if snapshot is None:
+            return
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        temporary = snapshot.with_suffix(".tmp")
+        with open(temporary, "wb") as f:
+            pickle.dump(
+                {"format": SNAPSHOT_FORMAT, "path": key, "entry": entry},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(temporary, snapshot)
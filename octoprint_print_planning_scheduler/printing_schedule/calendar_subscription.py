@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable
+
+from octoprint_print_planning_scheduler.printing_schedule.calendar_cache import (
+    CalendarCache,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+    RecurringEvent,
+    SingleEvent,
+    parse_events,
+)
+from octoprint_print_planning_scheduler.printing_schedule.instrumentation import (
+    metrics,
+)
+
+_logger = logging.getLogger(__name__)
+
+
+class CalendarSubscription:
+    """A remote .ics calendar kept up to date from a daemon thread.
+
+    Requests are conditional on the ETag and Last-Modified of the last
+    response, and a body with the same content hash as before is not parsed
+    again. The body is kept in ``cache_file`` so a restart has a calendar
+    before the first request succeeds. Failed requests are retried after
+    ``min_backoff`` seconds, doubled per failure up to ``max_backoff``.
+
+    New events replace the old ones in a single assignment, so ``calendar``
+    never blocks on the network and never sees a half updated calendar.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        cache_file: Path,
+        calendar_cache: CalendarCache | None = None,
+        refresh_interval: float = 900.0,
+        timeout: float = 30.0,
+        min_backoff: float = 30.0,
+        max_backoff: float = 3600.0,
+        on_update: Callable[[], None] | None = None,
+    ):
+        self.url = url
+        self.cache_file = Path(cache_file)
+        self.calendar_cache = calendar_cache or CalendarCache()
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.on_update = on_update
+        self.fetches = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.updates = 0
+        self.failures = 0
+        self._events: list[SingleEvent | RecurringEvent] | None = None
+        self._validators: dict = {}
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def _validators_file(self) -> Path:
+        return self.cache_file.with_suffix(".json")
+
+    def calendar(self) -> InfiniteCalendar | None:
+        """A new calendar of the current events, None before the first fetch."""
+        events = self._events
+        return InfiniteCalendar(list(events)) if events is not None else None
+
+    def load_cached(self) -> bool:
+        """Use the body of the last successful request, if one was kept."""
+        if self._events is not None or not self.cache_file.exists():
+            return False
+        try:
+            with open(self._validators_file, "r") as f:
+                validators = json.load(f)
+        except (OSError, ValueError):
+            return False
+        # a body fetched from another URL must neither be used nor revalidated
+        if validators.get("url") != self.url:
+            return False
+        self._validators = validators
+        try:
+            self._events = self.calendar_cache.load(self.cache_file)
+        except Exception:
+            _logger.exception(f"Could not read the cached calendar {self.cache_file}")
+            self._validators = {}
+            return False
+        return True
+
+    def refresh(self) -> bool:
+        """Fetch the calendar once, True when its events changed."""
+        self.fetches += 1
+        metrics.count("subscription_fetches")
+        request = urllib.request.Request(self.url)
+        if self._events is not None:
+            if self._validators.get("etag"):
+                request.add_header("If-None-Match", self._validators["etag"])
+            if self._validators.get("last_modified"):
+                request.add_header(
+                    "If-Modified-Since", self._validators["last_modified"]
+                )
+        try:
+            with metrics.measure("subscription.fetch"):
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    body = response.read()
+                    headers = response.headers
+        except urllib.error.HTTPError as error:
+            if error.code != 304:
+                raise
+            self.not_modified += 1
+            return False
+
+        digest = hashlib.sha256(body).hexdigest()
+        validators = {
+            "url": self.url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "digest": digest,
+        }
+        if self._events is not None and digest == self._validators.get("digest"):
+            self.unchanged += 1
+            if not self._stopped.is_set():
+                self._save_validators(validators)
+            return False
+        # a body that does not parse leaves the current calendar and cache file
+        events = parse_events(body)
+        if self._stopped.is_set():
+            # a replaced subscription must not touch the cache of its successor
+            return False
+        self._write(self.cache_file, body)
+        self._save_validators(validators)
+        self._events = events
+        self.updates += 1
+        if self.on_update is not None:
+            self.on_update()
+        return True
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="CalendarSubscription", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        """Stop refreshing, a fetch still in flight is dropped when it ends."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def next_delay(self) -> float:
+        if not self.failures:
+            return self.refresh_interval
+        return min(self.max_backoff, self.min_backoff * 2 ** (self.failures - 1))
+
+    def _save_validators(self, validators: dict):
+        self._validators = validators
+        self._write(self._validators_file, json.dumps(validators).encode("utf-8"))
+
+    def _run(self):
+        if self.load_cached() and self.on_update is not None:
+            self.on_update()
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+                self.failures = 0
+            except Exception as error:
+                self.failures += 1
+                metrics.count("subscription_failures")
+                _logger.warning(f"Could not fetch calendar {self.url}: {error}")
+            self._stopped.wait(self.next_delay())
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(path.suffix + ".tmp")
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
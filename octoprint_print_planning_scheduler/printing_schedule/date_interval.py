@@ -1,12 +1,73 @@
-from dataclasses import dataclass
-from datetime import datetime
+from __future__ import annotations
 
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
 
 _DATE_FORMAT = "%Y-%m-%dT%H-%M"
 
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_KEY_RESOLUTION = timedelta(microseconds=1)
+_KEY_HOUR = 3_600_000_000
+
+
+@lru_cache(maxsize=4096)
+def _wall_offset(year, month, day, hour, zone) -> int:
+    # local UTC offset of a wall clock hour, DST only changes on whole hours
+    wall = datetime(year, month, day, hour)
+    return wall.astimezone().utcoffset() // _KEY_RESOLUTION
+
+
+@lru_cache(maxsize=4096)
+def _utc_offset(utc_hour: int, zone) -> int:
+    utc = _EPOCH_UTC + timedelta(microseconds=utc_hour * _KEY_HOUR)
+    return utc.astimezone().utcoffset() // _KEY_RESOLUTION
+
+
+def to_key(value: datetime) -> int:
+    # microseconds since the epoch in UTC, naive datetimes are local time
+    if value.tzinfo is None:
+        offset = _wall_offset(
+            value.year, value.month, value.day, value.hour, time.tzname
+        )
+        return (value - _EPOCH) // _KEY_RESOLUTION - offset
+    return (value - _EPOCH_UTC) // _KEY_RESOLUTION
+
+
+def from_key(key: int, tz: tzinfo | None = None) -> datetime:
+    if tz is None:
+        offset = _utc_offset(key // _KEY_HOUR, time.tzname)
+        return _EPOCH + timedelta(microseconds=key + offset)
+    return (_EPOCH_UTC + timedelta(microseconds=key)).astimezone(tz)
+
+
+def to_datetime(value: date | datetime) -> datetime:
+    """All-day dates start at local midnight, datetimes are kept as they are."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, datetime.min.time())
+
+
+def to_utc(value: date | datetime) -> datetime:
+    """``value`` as an aware UTC datetime, naive values are local time."""
+    return to_datetime(value).astimezone(timezone.utc)
+
+
+def as_timezone(value: datetime, tz: tzinfo | None) -> datetime:
+    """``value`` as wall time in ``tz``, naive local time when ``tz`` is None."""
+    if tz is None:
+        if value.tzinfo is None:
+            return value
+        return value.astimezone().replace(tzinfo=None)
+    return value.astimezone(tz)
+
 
 @dataclass(unsafe_hash=True)
 class DateInterval:
+    __slots__ = ("start", "end")
+
     start: datetime
     end: datetime
 
@@ -1,80 +1,254 @@
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, tzinfo
 from bisect import bisect_left, bisect_right
+from heapq import merge
+from typing import Iterable, Iterator
+
+from .date_interval import DateInterval, from_key, to_key
+from .instrumentation import metrics
+
 
-from .date_interval import DateInterval
+def _coalesce(pairs: Iterable[tuple[int, int]]) -> tuple[array, array]:
+    # pairs must be sorted by start
+    starts = array("q")
+    ends = array("q")
+    merged = 0
+    for start, end in pairs:
+        if ends and ends[-1] >= start:  # overlap or contiguous
+            merged += 1
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+    metrics.count("intervals_merged", merged)
+    return starts, ends
 
 
-@dataclass
 class DateIntervalSet:
-    intervals: list[DateInterval] = field(default_factory=list)
+    """Sorted set of disjoint intervals.
 
-    def __post_init__(self):
-        initial_intervals = self.intervals
-        self.intervals = []
-        for interval in initial_intervals:
-            self.add(interval)
+    Endpoints are stored as int64 epoch keys (see ``to_key``) in two parallel
+    arrays, ``DateInterval`` objects are only created when intervals are read.
+    """
 
-    def add(self, new_interval: DateInterval):
-        # Insert and merge intervals
-        self.intervals.append(new_interval)
-        self.intervals.sort(key=lambda interval: interval.start)
-        merged_intervals = []
-        current = self.intervals[0]
-        for interval in self.intervals[1:]:
-            if current.end >= interval.start:  # overlap or contiguous
-                current = DateInterval(current.start, max(current.end, interval.end))
+    def __init__(self, intervals: Iterable[DateInterval] | None = None):
+        self._starts = array("q")
+        self._ends = array("q")
+        self._tzinfo: tzinfo | None = None
+        if intervals:
+            intervals = list(intervals)
+            if intervals:
+                self._tzinfo = intervals[0].start.tzinfo
+                pairs = sorted((to_key(i.start), to_key(i.end)) for i in intervals)
+                self._starts, self._ends = _coalesce(pairs)
+
+    @classmethod
+    def from_unsorted(cls, intervals: Iterable[DateInterval]) -> "DateIntervalSet":
+        return cls(intervals)
+
+    @classmethod
+    def from_sorted_keys(
+        cls, pairs: Iterable[tuple[int, int]], tz: tzinfo | None = None
+    ) -> "DateIntervalSet":
+        return cls._from_arrays(*_coalesce(pairs), tz)
+
+    @classmethod
+    def _from_arrays(
+        cls, starts: array, ends: array, tz: tzinfo | None
+    ) -> "DateIntervalSet":
+        result = cls()
+        result._starts = starts
+        result._ends = ends
+        result._tzinfo = tz
+        return result
+
+    @property
+    def tzinfo(self) -> tzinfo | None:
+        return self._tzinfo
+
+    def _result_tzinfo(self, other: "DateIntervalSet") -> tzinfo | None:
+        return self._tzinfo if self._starts else other._tzinfo
+
+    def _interval(self, index: int) -> DateInterval:
+        return DateInterval(
+            from_key(self._starts[index], self._tzinfo),
+            from_key(self._ends[index], self._tzinfo),
+        )
+
+    @property
+    def intervals(self) -> list[DateInterval]:
+        return list(self)
+
+    def __iter__(self) -> Iterator[DateInterval]:
+        tz = self._tzinfo
+        for start, end in zip(self._starts, self._ends):
+            yield DateInterval(from_key(start, tz), from_key(end, tz))
+
+    def iter_keys(self) -> Iterator[tuple[int, int]]:
+        return zip(self._starts, self._ends)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __eq__(self, other):
+        if not isinstance(other, DateIntervalSet):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __repr__(self):
+        return f"{type(self).__name__}(intervals={self.intervals!r})"
+
+    def copy(self) -> "DateIntervalSet":
+        return self._from_arrays(
+            array("q", self._starts), array("q", self._ends), self._tzinfo
+        )
+
+    @metrics.timed("interval_set.union")
+    def union(self, other: "DateIntervalSet") -> "DateIntervalSet":
+        starts, ends = _coalesce(
+            merge(
+                zip(self._starts, self._ends),
+                zip(other._starts, other._ends),
+            )
+        )
+        return self._from_arrays(starts, ends, self._result_tzinfo(other))
+
+    @metrics.timed("interval_set.intersection")
+    def intersection(self, other: "DateIntervalSet") -> "DateIntervalSet":
+        starts = array("q")
+        ends = array("q")
+        i = j = 0
+        while i < len(self._starts) and j < len(other._starts):
+            start = max(self._starts[i], other._starts[j])
+            end = min(self._ends[i], other._ends[j])
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+            if self._ends[i] < other._ends[j]:
+                i += 1
             else:
-                merged_intervals.append(current)
-                current = interval
-        merged_intervals.append(current)
-        self.intervals = merged_intervals
+                j += 1
+        return self._from_arrays(starts, ends, self._tzinfo)
+
+    @metrics.timed("interval_set.difference")
+    def difference(self, other: "DateIntervalSet") -> "DateIntervalSet":
+        starts = array("q")
+        ends = array("q")
+        j = 0
+        other_count = len(other._starts)
+        for start, end in zip(self._starts, self._ends):
+            # skip removed intervals that end before this one starts
+            while j < other_count and other._ends[j] <= start:
+                j += 1
+            k = j
+            while k < other_count and other._starts[k] < end:
+                if other._starts[k] > start:
+                    starts.append(start)
+                    ends.append(other._starts[k])
+                start = max(start, other._ends[k])
+                k += 1
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+        return self._from_arrays(starts, ends, self._tzinfo)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def add(self, new_interval: DateInterval):
+        if not self._starts:
+            self._tzinfo = new_interval.start.tzinfo
+        # only neighbours that overlap or touch the new interval are merged
+        start, end = to_key(new_interval.start), to_key(new_interval.end)
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end, lo)
+        if lo < hi:
+            metrics.count("intervals_merged", hi - lo)
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = array("q", (start,))
+        self._ends[lo:hi] = array("q", (end,))
 
     def extend(self, interval_set: "DateIntervalSet"):
-        for interval in interval_set.intervals:
-            self.add(interval)
+        if interval_set._starts:
+            merged = self.union(interval_set)
+            self._starts, self._ends = merged._starts, merged._ends
+            self._tzinfo = merged._tzinfo
 
     def remove_interval(self, remove_interval: DateInterval):
-        new_intervals = []
-        for interval in self.intervals:
-            if (
-                remove_interval.start <= interval.start
-                and remove_interval.end >= interval.end
-            ):
-                continue  # interval completely removed
-            elif (
-                remove_interval.start > interval.end
-                or remove_interval.end < interval.start
-            ):
-                new_intervals.append(interval)  # no overlap
-            else:
-                # partial overlaps
-                if remove_interval.start > interval.start:
-                    new_intervals.append(
-                        DateInterval(interval.start, remove_interval.start)
-                    )
-                if remove_interval.end < interval.end:
-                    new_intervals.append(
-                        DateInterval(remove_interval.end, interval.end)
-                    )
-        self.intervals = new_intervals
+        # intervals that only touch the removed one stay unchanged
+        remove_start = to_key(remove_interval.start)
+        remove_end = to_key(remove_interval.end)
+        lo = bisect_right(self._ends, remove_start)
+        hi = bisect_left(self._starts, remove_end, lo)
+        if lo >= hi:
+            return
+        new_starts = array("q")
+        new_ends = array("q")
+        if self._starts[lo] < remove_start:
+            new_starts.append(self._starts[lo])
+            new_ends.append(remove_start)
+        if self._ends[hi - 1] > remove_end:
+            new_starts.append(remove_end)
+            new_ends.append(self._ends[hi - 1])
+        self._starts[lo:hi] = new_starts
+        self._ends[lo:hi] = new_ends
 
     def get_inverted_intervals(self, start: datetime, end: datetime):
         result = []
-        previous_end = start
-        for interval in self.intervals:
-            if interval.start > previous_end:
-                result.append(DateInterval(previous_end, interval.start))
-            previous_end = max(previous_end, interval.end)
-        if previous_end < end:
-            result.append(DateInterval(previous_end, end))
+        tz = start.tzinfo
+        start_key, end_key = to_key(start), to_key(end)
+        previous_end = start_key
+        lo = bisect_left(self._ends, start_key)
+        hi = bisect_left(self._starts, end_key, lo)
+        for i in range(lo, hi):
+            if self._starts[i] > previous_end:
+                result.append(
+                    DateInterval(
+                        from_key(previous_end, tz), from_key(self._starts[i], tz)
+                    )
+                )
+            previous_end = max(previous_end, self._ends[i])
+        if previous_end < end_key:
+            result.append(DateInterval(from_key(previous_end, tz), end))
         return result
 
+    def _index_at(self, key: int) -> int:
+        # index of the interval containing key, or -1
+        idx = bisect_right(self._starts, key) - 1
+        if idx >= 0 and key <= self._ends[idx]:
+            return idx
+        return -1
+
+    def contains(self, dt: datetime) -> bool:
+        return self._index_at(to_key(dt)) >= 0
+
+    def interval_at(self, dt: datetime) -> DateInterval | None:
+        idx = self._index_at(to_key(dt))
+        return self._interval(idx) if idx >= 0 else None
+
+    def covering(self, start: datetime, end: datetime) -> DateInterval | None:
+        idx = self._index_at(to_key(start))
+        if idx >= 0 and to_key(end) <= self._ends[idx]:
+            return self._interval(idx)
+        return None
+
+    def next_gap_after(self, dt: datetime) -> DateInterval:
+        """First uncovered interval at or after dt, its end is None if unbounded."""
+        key = to_key(dt)
+        idx = bisect_right(self._starts, key)
+        gap_start = dt
+        if idx > 0 and key <= self._ends[idx - 1]:
+            gap_start = from_key(self._ends[idx - 1], dt.tzinfo)
+        gap_end = from_key(self._starts[idx], dt.tzinfo) if idx < len(self) else None
+        return DateInterval(gap_start, gap_end)
+
     def find_closest_future_interval(self, dt: datetime):
-        if not self.intervals:
-            return None
-        starts = [interval.start for interval in self.intervals]
-        idx = bisect_right(starts, dt)
-        if idx < len(self.intervals):
-            return self.intervals[idx]
+        idx = bisect_right(self._starts, to_key(dt))
+        if idx < len(self._starts):
+            return self._interval(idx)
         return None
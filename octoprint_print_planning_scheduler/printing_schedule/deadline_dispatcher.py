@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+from datetime import datetime
+from itertools import count
+from typing import Callable, Hashable
+
+_logger = logging.getLogger(__name__)
+
+
+class DeadlineDispatcher:
+    """Runs callbacks at wall clock deadlines from a single sleeping thread.
+
+    Deadlines are kept in a heap and the thread sleeps until the earliest
+    one, it only wakes up early when the earliest deadline changes. Each
+    callback has a key, scheduling a key again replaces its deadline and
+    cancelled entries are skipped when they reach the top of the heap.
+    ``max_sleep`` bounds a single sleep so a wall clock adjustment is noticed.
+    """
+
+    def __init__(self, max_sleep: float = 3600.0):
+        self.max_sleep = max_sleep
+        self.wakeups = 0
+        self._condition = threading.Condition()
+        self._heap: list[tuple[datetime, int, Hashable]] = []
+        self._entries: dict[Hashable, tuple[datetime, int, Callable[[], None]]] = {}
+        self._sequence = count()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, key: Hashable, when: datetime, callback: Callable[[], None]):
+        with self._condition:
+            sequence = next(self._sequence)
+            self._entries[key] = (when, sequence, callback)
+            heapq.heappush(self._heap, (when, sequence, key))
+            if self._heap[0][1] == sequence:
+                self._condition.notify()
+
+    def cancel(self, key: Hashable):
+        with self._condition:
+            self._entries.pop(key, None)
+
+    def next_deadline(self) -> datetime | None:
+        with self._condition:
+            self._drop_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        with self._condition:
+            self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="DeadlineDispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _drop_cancelled(self):
+        while self._heap:
+            when, sequence, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == sequence:
+                return
+            heapq.heappop(self._heap)
+
+    def _next_due(self) -> Callable[[], None] | None:
+        with self._condition:
+            while not self._stopping:
+                self._drop_cancelled()
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                when, _, key = self._heap[0]
+                delay = (when - datetime.now(when.tzinfo)).total_seconds()
+                if delay <= 0:
+                    heapq.heappop(self._heap)
+                    return self._entries.pop(key)[2]
+                self._condition.wait(min(delay, self.max_sleep))
+                self.wakeups += 1
+            return None
+
+    def _run(self):
+        while True:
+            callback = self._next_due()
+            if callback is None:
+                return
+            try:
+                callback()
+            except Exception:
+                _logger.exception("Scheduled callback failed")
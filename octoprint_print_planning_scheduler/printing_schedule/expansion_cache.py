@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from heapq import merge
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+    from_key,
+    to_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.instrumentation import (
+    metrics,
+)
+
+
+class _OccurrenceBuffer:
+    """Expanded occurrences of one recurring event whose start lies in [start, end]."""
+
+    __slots__ = ("start", "end", "starts", "ends")
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+        self.starts = array("q")
+        self.ends = array("q")
+
+    def append(self, occurrences):
+        for occurrence in occurrences:
+            self.starts.append(to_key(occurrence.start))
+            self.ends.append(to_key(occurrence.end))
+
+    def drop_before(self, key: int):
+        count = bisect_left(self.starts, key)
+        del self.starts[:count]
+        del self.ends[:count]
+        self.start = key
+
+    def slice(self, start: int, end: int):
+        lo = bisect_left(self.starts, start)
+        hi = bisect_right(self.starts, end, lo)
+        return zip(self.starts[lo:hi], self.ends[lo:hi])
+
+
+class ExpansionCache:
+    """Memoizes calendar expansion per (calendar version, window).
+
+    Merged results are kept for the ``max_windows`` most recently used windows.
+    Below that, occurrences of every recurring event are buffered, so a window
+    that slides forward only expands the part it has not seen yet.
+    """
+
+    def __init__(self, max_windows: int = 16):
+        self.max_windows = max_windows
+        self.hits = 0
+        self.misses = 0
+        self.expanded_occurrences = 0
+        self._windows: OrderedDict[tuple[int, int, int], DateIntervalSet] = (
+            OrderedDict()
+        )
+        self._buffers: dict[int, tuple[object, _OccurrenceBuffer]] = {}
+        self._version = None
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "windows": len(self._windows),
+            "buffered_occurrences": sum(
+                len(buffer.starts) for _, buffer in self._buffers.values()
+            ),
+            "expanded_occurrences": self.expanded_occurrences,
+        }
+
+    def clear(self):
+        self._windows.clear()
+        self._buffers.clear()
+
+    def intervals_for_period(
+        self, events: list, version: int, period: DateInterval
+    ) -> DateIntervalSet:
+        start, end = to_key(period.start), to_key(period.end)
+        window_key = (version, start, end)
+        cached = self._windows.get(window_key)
+        if cached is not None:
+            self._windows.move_to_end(window_key)
+            self.hits += 1
+            metrics.count("expansion_cache_hits")
+            return cached.copy()
+
+        self.misses += 1
+        metrics.count("expansion_cache_misses")
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+        sources = [self._event_keys(event, start, end) for event in events]
+        result = DateIntervalSet.from_sorted_keys(merge(*sources), period.start.tzinfo)
+
+        self._windows[window_key] = result
+        if len(self._windows) > self.max_windows:
+            self._windows.popitem(last=False)
+        return result.copy()
+
+    def event_added(self, event, version: int):
+        # cached windows are patched with the new event instead of dropped
+        for (_, start, end), result in self._windows.items():
+            result.extend(self._event_set(event, start, end, result.tzinfo))
+        self._rekey(version)
+
+    def event_removed(self, event, remaining_events: list, version: int):
+        self._buffers.pop(id(event), None)
+        for window_key, result in list(self._windows.items()):
+            _, start, end = window_key
+            removed = self._event_set(event, start, end, result.tzinfo)
+            if not len(removed):
+                continue
+            # only the span the event covered has to be rebuilt from the others
+            span_end = list(removed.iter_keys())[-1][1]
+            others = DateIntervalSet.from_sorted_keys(
+                merge(
+                    *(
+                        self._event_keys(other, start, end, span_end, keep=True)
+                        for other in remaining_events
+                    )
+                ),
+                result.tzinfo,
+            )
+            self._windows[window_key] = result.difference(removed).union(
+                others.intersection(removed)
+            )
+        self._rekey(version)
+
+    def _rekey(self, version: int):
+        self._windows = OrderedDict(
+            ((version, start, end), result)
+            for (_, start, end), result in self._windows.items()
+        )
+        self._version = version
+
+    def _event_set(self, event, start: int, end: int, tz) -> DateIntervalSet:
+        return DateIntervalSet.from_sorted_keys(
+            self._event_keys(event, start, end, keep=True), tz
+        )
+
+    def _event_keys(self, event, start: int, end: int, until: int = None, keep=False):
+        """Key pairs of the event's intervals in the window [start, end].
+
+        Only occurrences starting up to ``until`` are returned when it is
+        given. With ``keep`` the buffers are read but never moved, so patching
+        an older window does not evict the one the next query will use.
+        """
+        until = end if until is None else min(until, end)
+        tz = event.start.tzinfo
+        if getattr(event, "recurrence", None) is None:
+            period = DateInterval(from_key(start, tz), from_key(end, tz))
+            return (
+                pair
+                for pair in event.generate_intervals(period).iter_keys()
+                if pair[0] <= until
+            )
+        entry = self._buffers.get(id(event))
+        if keep and (
+            entry is None or not entry[1].start <= start <= end <= entry[1].end
+        ):
+            occurrences = event.occurrences(
+                DateInterval(from_key(start, tz), from_key(until, tz))
+            )
+            return ((to_key(o.start), to_key(o.end)) for o in occurrences)
+        buffer = entry[1] if keep else self._buffer_for(event, start, end)
+        return buffer.slice(start, until)
+
+    def _buffer_for(self, event, start: int, end: int) -> _OccurrenceBuffer:
+        entry = self._buffers.get(id(event))
+        buffer = entry[1] if entry is not None else None
+        if buffer is None or not buffer.start <= start <= buffer.end:
+            buffer = _OccurrenceBuffer(start, end)
+            self._expand(event, buffer, start, end)
+            self._buffers[id(event)] = (event, buffer)
+            return buffer
+
+        if end > buffer.end:
+            covered_end = buffer.end
+            buffer.end = end
+            self._expand(event, buffer, covered_end, end, skip=covered_end)
+        # windows move forward, occurrences before the current one are not reused
+        buffer.drop_before(start)
+        return buffer
+
+    def _expand(self, event, buffer, start, end, skip=None):
+        tz = event.start.tzinfo
+        occurrences = event.occurrences(
+            DateInterval(from_key(start, tz), from_key(end, tz))
+        )
+        if skip is not None:
+            occurrences = (o for o in occurrences if to_key(o.start) != skip)
+        count = len(buffer.starts)
+        buffer.append(occurrences)
+        self.expanded_occurrences += len(buffer.starts) - count
+        metrics.count("occurrences_expanded", len(buffer.starts) - count)
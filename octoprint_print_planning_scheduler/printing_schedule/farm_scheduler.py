@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+    from_key,
+    to_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    FreeGapIndex,
+    duration_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+
+@dataclass
+class FarmPlacement:
+    printer: str
+    job: PrintJob
+    interval: DateInterval
+
+
+@dataclass
+class FarmPlan:
+    placements: list[FarmPlacement] = field(default_factory=list)
+    unscheduled: list[PrintJob] = field(default_factory=list)
+
+    def by_printer(self) -> dict[str, list[FarmPlacement]]:
+        result: dict[str, list[FarmPlacement]] = {}
+        for placement in self.placements:
+            result.setdefault(placement.printer, []).append(placement)
+        return result
+
+
+class FarmScheduler:
+    """Assigns jobs to printers that share one power availability calendar.
+
+    Printers are kept in a heap by the time they become free. Every job goes
+    to the printer that is free first, at the earliest moment from then on
+    where the whole job fits into a single availability window.
+    """
+
+    def __init__(self, printers: list[str], availability: DateIntervalSet):
+        self.printers = list(printers)
+        self.availability = availability
+
+    def plan(self, jobs: list[PrintJob], start: datetime) -> FarmPlan:
+        windows = FreeGapIndex(self.availability)
+        tz = self.availability.tzinfo
+        start_key = to_key(start)
+        free_at = [(start_key, order) for order in range(len(self.printers))]
+        heapq.heapify(free_at)
+
+        plan = FarmPlan()
+        for job in jobs:
+            length = duration_key(job.duration)
+            if not free_at:
+                plan.unscheduled.append(job)
+                continue
+            printer_free, order = free_at[0]
+            job_start = self._earliest_start(windows, printer_free, length)
+            if job_start is None:
+                # the printer that is free first has every window the others have
+                plan.unscheduled.append(job)
+                continue
+            heapq.heapreplace(free_at, (job_start + length, order))
+            plan.placements.append(
+                FarmPlacement(
+                    self.printers[order],
+                    job,
+                    DateInterval(
+                        from_key(job_start, tz), from_key(job_start + length, tz)
+                    ),
+                )
+            )
+        return plan
+
+    @staticmethod
+    def _earliest_start(windows: FreeGapIndex, not_before: int, length: int):
+        current = windows.locate(not_before)
+        if current >= 0 and windows.gap_keys(current)[1] - not_before >= length:
+            return not_before
+        following = windows.first_fit(length, current + 1)
+        if following < 0:
+            return None
+        return windows.gap_keys(following)[0]
+
+
+def _plan_group(printers, jobs, availability, start) -> FarmPlan:
+    return FarmScheduler(printers, availability).plan(jobs, start)
+
+
+def plan_groups(
+    groups: dict[str, tuple[list[str], list[PrintJob]]],
+    availability: DateIntervalSet,
+    start: datetime,
+    max_workers: int | None = None,
+) -> dict[str, FarmPlan]:
+    """Plan independent printer groups, in a process pool when there are several.
+
+    ``groups`` maps a group name to its printers and job queue.
+    """
+    if len(groups) < 2 or max_workers == 1:
+        return {
+            name: _plan_group(printers, jobs, availability, start)
+            for name, (printers, jobs) in groups.items()
+        }
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(_plan_group, printers, jobs, availability, start)
+            for name, (printers, jobs) in groups.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
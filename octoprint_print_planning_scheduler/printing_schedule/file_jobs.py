@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from octoprint_print_planning_scheduler.printing_schedule.gcode_estimator import (
+    GcodeTimeEstimator,
+    file_digest,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+
+class EstimateStore:
+    """Estimated print seconds by file hash, saved as JSON when a file is given.
+
+    A file that was already estimated is never read again, also after a
+    restart or when it was moved or renamed. Hashes are remembered by path,
+    modification time and size, so an unchanged file is not hashed again.
+    """
+
+    def __init__(self, store_file: Path | None = None):
+        self.store_file = Path(store_file) if store_file else None
+        self.estimates = 0
+        self.hashes = 0
+        self._lock = threading.Lock()
+        self._seconds: dict[str, float] = {}
+        # path -> [mtime_ns, size, digest]
+        self._files: dict[str, list] = {}
+        if self.store_file is not None and self.store_file.exists():
+            try:
+                with open(self.store_file, "r") as f:
+                    data = json.load(f)
+                if "seconds" in data:
+                    self._seconds = data["seconds"]
+                    self._files = data.get("files", {})
+                else:
+                    # stores written before file hashes were kept
+                    self._seconds = data
+            except (OSError, ValueError, TypeError):
+                # a broken store only costs estimating the files again
+                self._seconds, self._files = {}, {}
+
+    def get(self, digest: str) -> timedelta | None:
+        with self._lock:
+            seconds = self._seconds.get(digest)
+        return timedelta(seconds=seconds) if seconds is not None else None
+
+    def digest(self, file_path: Path) -> str:
+        key = str(Path(file_path).resolve())
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._files.get(key)
+        if entry is not None and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return entry[2]
+        self.hashes += 1
+        digest = file_digest(file_path)
+        with self._lock:
+            self._files[key] = [stat.st_mtime_ns, stat.st_size, digest]
+            self._save()
+        return digest
+
+    def put(self, digest: str, duration: timedelta):
+        with self._lock:
+            self._seconds[digest] = duration.total_seconds()
+            self._save()
+
+    def estimate(
+        self,
+        file_path: Path,
+        digest: str | None = None,
+        estimator: GcodeTimeEstimator | None = None,
+    ) -> timedelta:
+        digest = digest or self.digest(file_path)
+        duration = self.get(digest)
+        if duration is None:
+            self.estimates += 1
+            duration = (estimator or GcodeTimeEstimator()).estimate(file_path)
+            self.put(digest, duration)
+        return duration
+
+    def _save(self):
+        if self.store_file is None:
+            return
+        self.store_file.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.store_file.with_suffix(".tmp")
+        with open(temporary, "w") as f:
+            json.dump({"seconds": self._seconds, "files": self._files}, f)
+        os.replace(temporary, self.store_file)
+
+
+def job_from_file(
+    file_manager,
+    path: str,
+    store: EstimateStore,
+    storage: str = "local",
+    priority: int = 1,
+    deadline: datetime | None = None,
+) -> PrintJob:
+    """PrintJob for a file of OctoPrint's file manager.
+
+    The duration is the analysis ``estimatedPrintTime`` when OctoPrint has
+    one, otherwise the file is estimated once per content hash.
+    """
+    metadata = file_manager.get_metadata(storage, path) or {}
+    seconds = (metadata.get("analysis") or {}).get("estimatedPrintTime")
+    if seconds:
+        duration = timedelta(seconds=seconds)
+    else:
+        duration = store.estimate(
+            Path(file_manager.path_on_disk(storage, path)), metadata.get("hash")
+        )
+    return PrintJob(Path(path).name, duration, priority, deadline, path)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import re
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator
+
+CHUNK_SIZE = 1 << 20
+
+_WORD = re.compile(rb"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+
+
+def _mapped_lines(file_path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    # a file mapping lets the OS page the file in, only one chunk is copied
+    with open(file_path, "rb") as f:
+        if not f.seek(0, 2):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            rest = b""
+            for offset in range(0, len(mapped), chunk_size):
+                lines = (rest + mapped[offset : offset + chunk_size]).split(b"\n")
+                rest = lines.pop()
+                yield from lines
+            if rest:
+                yield rest
+
+
+def file_digest(file_path: Path, chunk_size: int = CHUNK_SIZE) -> str:
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GcodeTimeEstimator:
+    """Print time of a G-code file from move lengths and feed rates.
+
+    Moves run at their programmed feed rate, acceleration is ignored, so the
+    estimate is a lower bound that ``speed_factor`` can stretch. Relative
+    and absolute positioning, inch units and G4 dwells are handled.
+    """
+
+    def __init__(self, default_feedrate: float = 3000.0, speed_factor: float = 1.0):
+        # feed rates are in mm/min like in the files
+        self.default_feedrate = default_feedrate
+        self.speed_factor = speed_factor
+
+    def estimate(self, file_path: Path) -> timedelta:
+        seconds = 0.0
+        position = {b"X": 0.0, b"Y": 0.0, b"Z": 0.0, b"E": 0.0}
+        feedrate = self.default_feedrate
+        relative = relative_extrusion = False
+        scale = 1.0
+        for line in _mapped_lines(file_path):
+            line = line.split(b";", 1)[0].strip().upper()
+            if not line:
+                continue
+            words = dict(_WORD.findall(line))
+            command = line[:1] + words.get(line[:1], b"")
+            if command in (b"G0", b"G1", b"G00", b"G01"):
+                if b"F" in words:
+                    feedrate = float(words[b"F"]) * scale or feedrate
+                deltas = {}
+                for axis in position:
+                    if axis in words:
+                        value = float(words[axis]) * scale
+                        is_relative = relative or (axis == b"E" and relative_extrusion)
+                        target = position[axis] + value if is_relative else value
+                        deltas[axis] = target - position[axis]
+                        position[axis] = target
+                distance = math.sqrt(
+                    sum(deltas.get(axis, 0.0) ** 2 for axis in (b"X", b"Y", b"Z"))
+                ) or abs(deltas.get(b"E", 0.0))
+                seconds += distance / feedrate * 60
+            elif command == b"G4":
+                seconds += float(words.get(b"P", 0)) / 1000 + float(words.get(b"S", 0))
+            elif command == b"G90":
+                relative = False
+            elif command == b"G91":
+                relative = True
+            elif command == b"M82":
+                relative_extrusion = False
+            elif command == b"M83":
+                relative_extrusion = True
+            elif command == b"G20":
+                scale = 25.4
+            elif command == b"G21":
+                scale = 1.0
+            elif command == b"G92":
+                for axis in position:
+                    if axis in words:
+                        position[axis] = float(words[axis]) * scale
+        return timedelta(seconds=seconds * self.speed_factor)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+from icalendar import vDDDTypes, vRecur
+
+# the only VEVENT properties the scheduler uses
+_WANTED = {"DTSTART", "DTEND", "DURATION", "RRULE"}
+
+
+def _unfolded_lines(file_path: Path) -> Iterator[str]:
+    with open(file_path, "rb") as f:
+        current = None
+        for raw in f:
+            line = raw.rstrip(b"\r\n")
+            if line[:1] in (b" ", b"\t"):
+                if current is not None:
+                    current += line[1:]
+                continue
+            if current is not None:
+                yield current.decode("utf-8", errors="replace")
+            current = line
+        if current is not None:
+            yield current.decode("utf-8", errors="replace")
+
+
+def _split_property(line: str) -> tuple[str, dict[str, str], str]:
+    # NAME;PARAM=VALUE;PARAM="QUOTED:VALUE":VALUE
+    in_quotes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            head, value = line[:index], line[index + 1 :]
+            break
+    else:
+        return line.upper(), {}, ""
+    name, *params = head.split(";")
+    parameters = {}
+    for param in params:
+        key, _, param_value = param.partition("=")
+        parameters[key.upper()] = param_value.strip('"')
+    return name.upper(), parameters, value
+
+
+def iter_vevents(file_path: Path) -> Iterator[tuple]:
+    """Yield (start, end, rrule, duration) for every VEVENT of an .ics file.
+
+    The file is read line by line and only DTSTART, DTEND, DURATION and RRULE
+    are decoded, so memory does not grow with the size of the file. ``end``,
+    ``duration`` and ``rrule`` are None when the event does not have them.
+    """
+    depth = 0
+    properties = None
+    for line in _unfolded_lines(file_path):
+        name, parameters, value = _split_property(line)
+        if name == "BEGIN":
+            depth += 1
+            if value.upper() == "VEVENT":
+                properties = {}
+                event_depth = depth
+        elif name == "END":
+            if properties is not None and depth == event_depth:
+                if "DTSTART" in properties:
+                    yield (
+                        properties["DTSTART"],
+                        properties.get("DTEND"),
+                        properties.get("RRULE"),
+                        properties.get("DURATION"),
+                    )
+                properties = None
+            depth -= 1
+        elif properties is not None and depth == event_depth and name in _WANTED:
+            if name == "RRULE":
+                properties[name] = vRecur.from_ical(value)
+            else:
+                properties[name] = vDDDTypes.from_ical(
+                    value, timezone=parameters.get("TZID")
+                )
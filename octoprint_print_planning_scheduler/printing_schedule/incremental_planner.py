@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Iterable
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+    from_key,
+    to_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    FreeGapIndex,
+    Placement,
+    PlacementResult,
+    duration_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+
+class IncrementalPlanner:
+    """Plan that is patched in place when jobs or outages change.
+
+    Free time is kept in a ``FreeGapIndex``, so placing a job is a first fit
+    search in O(log n), and placements in a map from job id to ``Placement``
+    plus a list of (start key, job id) sorted by start. Every change only
+    touches the jobs whose placement it overlaps; time that becomes free is
+    offered to the jobs planned after it and the unscheduled jobs, in queue
+    order. Jobs pinned by ``job_started`` are not moved by that. Time before
+    ``now`` is never handed out, also not when a job that already started
+    gives its time back.
+    """
+
+    def __init__(
+        self,
+        free: DateIntervalSet,
+        jobs: list[PrintJob] | None = None,
+        now: datetime | None = None,
+    ):
+        self.now: datetime | None = None
+        self.available_time = timedelta(
+            microseconds=sum(end - start for start, end in free.iter_keys())
+        )
+        self.placements: dict[int, Placement] = {}
+        self.unscheduled: dict[int, PrintJob] = {}
+        self._by_start: list[tuple[int, int]] = []
+        self._pinned: set[int] = set()
+        self._ids = count(1)
+        self._gaps = FreeGapIndex(free)
+        # gaps before this index lie entirely before ``now``
+        self._not_before = 0
+        self._set_now(now)
+        for job in jobs or []:
+            self.add_job(job)
+
+    @property
+    def free(self) -> DateIntervalSet:
+        return self._gaps.remaining(self._not_before)
+
+    def add_job(self, job: PrintJob) -> int:
+        job_id = next(self._ids)
+        if not self._place(job_id, job):
+            self.unscheduled[job_id] = job
+        return job_id
+
+    def cancel_job(self, job_id: int, now: datetime | None = None):
+        self._set_now(now)
+        if self.unscheduled.pop(job_id, None) is not None:
+            return
+        self._give_back(self._unplace(job_id).interval)
+
+    def job_started(self, job_id: int, start: datetime, now: datetime | None = None):
+        """Pin a job to the time it really started, other jobs make room."""
+        self._set_now(now)
+        job = self.unscheduled.pop(job_id, None)
+        if job is None:
+            placement = self._unplace(job_id)
+            job = placement.job
+            self._rebuild(self._released([placement.interval]))
+        interval = DateInterval(start, start + job.duration)
+        self._block(interval)
+        self.placements[job_id] = Placement(job, interval)
+        insort(self._by_start, (to_key(start), job_id))
+        self._pinned.add(job_id)
+
+    def job_finished(
+        self, job_id: int, actual_end: datetime, now: datetime | None = None
+    ):
+        # a finished job leaves the plan, only the time it did not use changes
+        self._set_now(now)
+        interval = self._unplace(job_id).interval
+        if actual_end < interval.end:
+            self._give_back(DateInterval(max(actual_end, interval.start), interval.end))
+        elif actual_end > interval.end:
+            self._block(DateInterval(interval.end, actual_end))
+
+    def add_outage(self, start: datetime, end: datetime, now: datetime | None = None):
+        self._set_now(now)
+        self.available_time -= self._block(DateInterval(start, end))
+
+    def advance(self, now: datetime, added: DateIntervalSet):
+        """Forget free time before ``now`` and plan into newly added time."""
+        self._set_now(now)
+        if len(added):
+            free = self.free
+            for interval in added:
+                free.add(interval)
+                self.available_time += interval.duration
+            self._rebuild(free)
+        self._fill_unscheduled()
+
+    def result(self) -> PlacementResult:
+        return PlacementResult(
+            # queue order, like PlacementEngine
+            [self.placements[job_id] for job_id in sorted(self.placements)],
+            [self.unscheduled[job_id] for job_id in sorted(self.unscheduled)],
+            self.free,
+            self.available_time,
+        )
+
+    def _set_now(self, now: datetime | None):
+        if now is None or (self.now is not None and now <= self.now):
+            return
+        self.now = now
+        key = to_key(now)
+        index = self._gaps.locate(key)
+        if index < 0:
+            return
+        start, end = self._gaps.gap_keys(index)
+        if end <= key:
+            self._not_before = index + 1
+            return
+        # cut off the part of the current gap that already passed
+        self._not_before = index
+        if start < key:
+            self._gaps.allocate(index, key - start)
+
+    def _rebuild(self, free: DateIntervalSet):
+        # ``free`` starts at ``now``, so no gap of the new index is skipped
+        self._gaps = FreeGapIndex(free)
+        self._not_before = 0
+
+    def _released(self, intervals: Iterable[DateInterval]) -> DateIntervalSet:
+        """Current free time plus the part of ``intervals`` after ``now``."""
+        free = self.free
+        for interval in intervals:
+            if self.now is not None:
+                if interval.end <= self.now:
+                    continue
+                interval = DateInterval(max(interval.start, self.now), interval.end)
+            free.add(interval)
+        return free
+
+    def _give_back(self, interval: DateInterval):
+        """Free ``interval`` and let the jobs planned after it move up."""
+        later = self._by_start[bisect_left(self._by_start, (to_key(interval.start),)) :]
+        released = [interval]
+        for _, job_id in later:
+            if job_id not in self._pinned:
+                placement = self._unplace(job_id)
+                released.append(placement.interval)
+                self.unscheduled[job_id] = placement.job
+        self._rebuild(self._released(released))
+        self._fill_unscheduled()
+
+    def _block(self, blocked: DateInterval) -> timedelta:
+        """Take ``blocked`` out of the plan, returns the power time it covered."""
+        start, end = to_key(blocked.start), to_key(blocked.end)
+        displaced = [
+            (job_id, self._unplace(job_id)) for job_id in self._overlapping(start, end)
+        ]
+        covered = sum(
+            min(end, to_key(p.interval.end)) - max(start, to_key(p.interval.start))
+            for _, p in displaced
+        )
+        free = self._released(p.interval for _, p in displaced)
+        covered += sum(
+            min(end, e) - max(start, s)
+            for s, e in self.free.iter_keys()
+            if s < end and e > start
+        )
+        free.remove_interval(blocked)
+        self._rebuild(free)
+        for job_id, placement in displaced:
+            if not self._place(job_id, placement.job):
+                self.unscheduled[job_id] = placement.job
+        self._fill_unscheduled()
+        return timedelta(microseconds=covered)
+
+    def _place(self, job_id: int, job: PrintJob) -> bool:
+        length = duration_key(job.duration)
+        index = self._gaps.first_fit(length, self._not_before)
+        if index < 0:
+            return False
+        start, end = self._gaps.allocate(index, length)
+        tz = self._gaps.tzinfo
+        self.placements[job_id] = Placement(
+            job, DateInterval(from_key(start, tz), from_key(end, tz))
+        )
+        insort(self._by_start, (start, job_id))
+        return True
+
+    def _unplace(self, job_id: int) -> Placement:
+        placement = self.placements.pop(job_id)
+        self._pinned.discard(job_id)
+        del self._by_start[
+            bisect_left(self._by_start, (to_key(placement.interval.start), job_id))
+        ]
+        return placement
+
+    def _overlapping(self, start: int, end: int) -> list[int]:
+        # placements never overlap, so only the one before ``start`` can reach in
+        position = bisect_left(self._by_start, (start,))
+        if position > 0:
+            previous_id = self._by_start[position - 1][1]
+            if to_key(self.placements[previous_id].interval.end) > start:
+                position -= 1
+        found = []
+        while position < len(self._by_start) and self._by_start[position][0] < end:
+            found.append(self._by_start[position][1])
+            position += 1
+        return found
+
+    def _fill_unscheduled(self):
+        for job_id in sorted(self.unscheduled):
+            if self._place(job_id, self.unscheduled[job_id]):
+                del self.unscheduled[job_id]
@@ -1,31 +1,157 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from heapq import merge
 from pathlib import Path
-from icalendar import Calendar
-from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Iterator
+from icalendar import Calendar, vRecur
+from datetime import datetime, time, timedelta, timezone, tzinfo
 from dateutil.rrule import rrule, rruleset, rrulestr
 
 from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
     DateInterval,
+    as_timezone,
+    from_key,
+    to_datetime,
+    to_key,
+    to_utc,
 )
 from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
     DateIntervalSet,
 )
+from octoprint_print_planning_scheduler.printing_schedule.expansion_cache import (
+    ExpansionCache,
+)
+from octoprint_print_planning_scheduler.printing_schedule.ics_stream import (
+    iter_vevents,
+)
+from octoprint_print_planning_scheduler.printing_schedule.instrumentation import (
+    metrics,
+)
+from octoprint_print_planning_scheduler.printing_schedule.simple_recurrence import (
+    SimpleRecurrence,
+)
+
+if TYPE_CHECKING:
+    from octoprint_print_planning_scheduler.printing_schedule.calendar_cache import (
+        CalendarCache,
+    )
+
+
+def parse_events(ical: str | bytes) -> list[SingleEvent | RecurringEvent]:
+    gcal = Calendar.from_ical(ical)
+    events = []
+    for component in gcal.walk():
+        if component.name == "VEVENT":
+            end = component.get("dtend")
+            duration = component.get("duration")
+            events.append(
+                make_event(
+                    component.get("dtstart").dt,
+                    end.dt if end is not None else None,
+                    component.get("rrule", None),
+                    duration.dt if duration is not None else None,
+                )
+            )
+    return sort_events(events)
+
+
+def sort_events(events: list) -> list:
+    return sorted(events, key=lambda e: e.start)
+
+
+def make_event(start, end, rule=None, duration=None) -> SingleEvent | RecurringEvent:
+    """Event with UTC endpoints, all-day dates start at local midnight.
+
+    Without an end the event lasts ``duration``, or one day for an all-day
+    event and no time otherwise, as RFC 5545 defines it.
+    """
+    if end is None:
+        if duration is None:
+            duration = timedelta(days=0 if isinstance(start, datetime) else 1)
+        end = to_datetime(start) + duration
+    start, end = to_datetime(start), to_datetime(end)
+    if rule is not None:
+        # only the RRULE is read, so COUNT and UNTIL alone decide the end
+        finite = "COUNT" in rule or "UNTIL" in rule
+        return RecurringEvent(start, end, parse_recurrence(start, rule), finite)
+    return SingleEvent(start, end)
+
+
+def parse_recurrence(start: datetime, rule) -> rrule | rruleset | SimpleRecurrence:
+    if "UNTIL" in rule:
+        rule = vRecur(rule)
+        rule["UNTIL"] = [until_like(until, start) for until in rule["UNTIL"]]
+    simple = SimpleRecurrence.from_rrule(start, rule)
+    if simple is not None:
+        return simple
+    return rrulestr(rule.to_ical().decode("utf-8"), dtstart=start)
+
+
+def until_like(until, start: datetime) -> datetime:
+    """UNTIL in the kind of DTSTART, dateutil rejects a rule that mixes them.
+
+    A floating start gets local wall time, an aware start gets UTC. A date
+    or floating UNTIL is read in the wall time of the start, and the whole
+    day of a date still counts.
+    """
+    if not isinstance(until, datetime):
+        until = datetime.combine(until, time(23, 59, 59))
+    if start.tzinfo is None:
+        return as_timezone(until, None)
+    if until.tzinfo is None:
+        until = until.replace(tzinfo=start.tzinfo)
+    return until.astimezone(timezone.utc)
 
 
 @dataclass
 class RecurringEvent:
+    """Occurrences of ``recurrence``, each lasting as long as start to end.
+
+    Start and end are kept in UTC. The rule steps in the wall time of the
+    timezone the start was given in, naive local time for floating events,
+    and every occurrence is converted to UTC once as it is produced.
+    """
+
     start: datetime
     end: datetime
-    recurrence: rrule | rruleset
+    recurrence: rrule | rruleset | SimpleRecurrence
+    # whether the rule has a last occurrence, events of unknown rules never end
+    finite: bool = False
+    zone: tzinfo | None = field(init=False, default=None)
+
+    def __post_init__(self):
+        self.zone = self.start.tzinfo
+        self.start, self.end = to_utc(self.start), to_utc(self.end)
+
+    def occurrences(self, period: DateInterval) -> Iterator[DateInterval]:
+        duration = self.end - self.start
+        start = as_timezone(period.start, self.zone)
+        end = as_timezone(period.end, self.zone)
+        for occurrence in self.recurrence.between(start, end, inc=True):
+            occurrence = to_utc(occurrence)
+            yield DateInterval(occurrence, occurrence + duration)
+
+    def iter_occurrences(self, after: datetime) -> Iterator[DateInterval]:
+        # an occurrence in progress at ``after`` is clipped like a SingleEvent
+        duration = self.end - self.start
+        wall = as_timezone(after, self.zone)
+        after = to_utc(after)
+        for occurrence in self.recurrence.xafter(wall - duration, inc=False):
+            occurrence = to_utc(occurrence)
+            yield DateInterval(max(occurrence, after), occurrence + duration)
 
     def generate_intervals(self, period: DateInterval) -> DateIntervalSet:
-        intervals = DateIntervalSet()
-        for occurrence in self.recurrence.between(period.start, period.end, inc=True):
-            occurrence_end = occurrence + (self.end - self.start)
-            intervals.add(DateInterval(occurrence, occurrence_end))
-        return intervals
+        return DateIntervalSet.from_sorted_keys(
+            ((to_key(o.start), to_key(o.end)) for o in self.occurrences(period)),
+            period.start.tzinfo,
+        )
+
+    def ends_before(self, cutoff: datetime) -> bool:
+        if not self.finite:
+            return False
+        latest_start = as_timezone(cutoff, self.zone) - (self.end - self.start)
+        return next(iter(self.recurrence.xafter(latest_start, inc=True)), None) is None
 
 
 @dataclass
@@ -33,43 +159,103 @@ class SingleEvent:
     start: datetime
     end: datetime
 
+    def __post_init__(self):
+        self.start, self.end = to_utc(self.start), to_utc(self.end)
+
     def generate_intervals(self, period: DateInterval) -> DateIntervalSet:
-        if self.start < period.end and self.end > period.start:
-            return DateIntervalSet(
-                [DateInterval(max(self.start, period.start), min(self.end, period.end))]
-            )
+        start = max(to_key(self.start), to_key(period.start))
+        end = min(to_key(self.end), to_key(period.end))
+        if start < end:
+            return DateIntervalSet.from_sorted_keys([(start, end)], period.start.tzinfo)
         return DateIntervalSet()
 
+    def ends_before(self, cutoff: datetime) -> bool:
+        return to_key(self.end) < to_key(cutoff)
+
+    def iter_occurrences(self, after: datetime) -> Iterator[DateInterval]:
+        after = to_utc(after)
+        if self.end > after:
+            yield DateInterval(max(self.start, after), self.end)
+
 
 class InfiniteCalendar:
-    def __init__(self, events: list[SingleEvent | RecurringEvent] | None = None):
+    def __init__(
+        self,
+        events: list[SingleEvent | RecurringEvent] | None = None,
+        expansion_cache: ExpansionCache | None = None,
+    ):
         self.events = events if events else []
+        self.expansion_cache = expansion_cache or ExpansionCache()
+        # cached expansions are only valid for the version they were made for
+        self.version = 0
+
+    def invalidate(self):
+        self.version += 1
+
+    def add_event(self, event: SingleEvent | RecurringEvent):
+        self.events.append(event)
+        self.version += 1
+        self.expansion_cache.event_added(event, self.version)
+
+    def remove_event(self, event: SingleEvent | RecurringEvent):
+        removed = self.events.pop(self.events.index(event))
+        self.version += 1
+        self.expansion_cache.event_removed(removed, self.events, self.version)
 
     @classmethod
-    def from_file(cls, file_path: Path) -> "InfiniteCalendar":
+    @metrics.timed("calendar.from_file")
+    def from_file(
+        cls, file_path: Path, cache: CalendarCache | None = None
+    ) -> "InfiniteCalendar":
+        if cache is not None:
+            return InfiniteCalendar(list(cache.load(file_path)))
         with open(file_path, "r") as f:
-            gcal = Calendar.from_ical(f.read())
-            events = []
-            for component in gcal.walk():
-                if component.name == "VEVENT":
-                    start = component.get("dtstart").dt
-                    end = component.get("dtend").dt
-                    recurrence = component.get("rrule", None)
-                    if recurrence is not None:
-                        events.append(
-                            RecurringEvent(
-                                start,
-                                end,
-                                rrulestr(recurrence.to_ical().decode("utf-8")),
-                            )
-                        )
-                    else:
-                        events.append(SingleEvent(start, end))
-            return InfiniteCalendar(sorted(events, key=lambda e: e.start))
+            return InfiniteCalendar(parse_events(f.read()))
 
+    @classmethod
+    @metrics.timed("calendar.from_stream")
+    def from_stream(
+        cls, file_path: Path, ended_before: datetime | None = None
+    ) -> "InfiniteCalendar":
+        events = []
+        for start, end, rule, duration in iter_vevents(file_path):
+            event = make_event(start, end, rule, duration)
+            if ended_before is None or not event.ends_before(ended_before):
+                events.append(event)
+        return InfiniteCalendar(sort_events(events))
+
+    @metrics.timed("calendar.generate_intervals_for_period")
     def generate_intervals_for_period(self, interval: DateInterval) -> DateIntervalSet:
-        total_intervals_set = DateIntervalSet()
-        for event in self.events:
-            intervals = event.generate_intervals(interval)
-            total_intervals_set.extend(intervals)
-        return total_intervals_set
+        return self.expansion_cache.intervals_for_period(
+            self.events, self.version, interval
+        )
+
+    def iter_intervals(
+        self, start: datetime, end: datetime | None = None
+    ) -> Iterator[DateInterval]:
+        """Lazily yield merged event intervals in time order.
+
+        Occurrences are taken from every event at once through a heap, so an
+        open-ended iteration keeps one pending occurrence per event in memory.
+        Iteration stops after the last interval starting before ``end``.
+        """
+        tz = start.tzinfo
+        end_key = to_key(end) if end is not None else None
+        streams = [
+            ((to_key(o.start), to_key(o.end)) for o in event.iter_occurrences(start))
+            for event in self.events
+        ]
+        current_start = current_end = None
+        for occurrence_start, occurrence_end in merge(*streams):
+            if end_key is not None and occurrence_start > end_key:
+                break
+            if current_end is not None and occurrence_start <= current_end:
+                current_end = max(current_end, occurrence_end)
+                continue
+            if current_end is not None:
+                yield DateInterval(
+                    from_key(current_start, tz), from_key(current_end, tz)
+                )
+            current_start, current_end = occurrence_start, occurrence_end
+        if current_end is not None:
+            yield DateInterval(from_key(current_start, tz), from_key(current_end, tz))
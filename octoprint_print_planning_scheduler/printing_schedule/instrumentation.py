@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, TypeVar
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+T = TypeVar("T")
+
+# upper bounds in seconds, the last bucket counts everything slower
+BUCKET_BOUNDS = tuple(
+    base * 10.0**exponent for exponent in range(-5, 2) for base in (1.0, 2.5, 5.0)
+)
+
+
+class Histogram:
+    """Counts of durations in fixed logarithmic buckets."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "buckets": [
+                {"le": bound, "count": count}
+                for bound, count in zip(BUCKET_BOUNDS + (None,), self.counts)
+                if count
+            ],
+        }
+
+
+class Metrics:
+    """Stage timings and counters shared by everything in a process.
+
+    Recording takes a lock and a few additions, so it stays on in production.
+    Setting ``enabled`` to False turns every recording method into a no-op
+    that returns before taking the lock.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._timings: dict[str, Histogram] = {}
+        self._counters: dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._timings.get(stage)
+            if histogram is None:
+                histogram = self._timings[stage] = Histogram()
+            histogram.record(seconds)
+
+    def count(self, name: str, amount: int = 1):
+        if not self.enabled or not amount:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def measure(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.record(stage, time.perf_counter() - started)
+
+    def timed(self, stage: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - started)
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "timings": {
+                    stage: histogram.to_dict()
+                    for stage, histogram in sorted(self._timings.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+
+
+metrics = Metrics()
+
+
+def profile_call(func: Callable[[], T], folder: Path) -> tuple[T, Path]:
+    """Run ``func`` under a profiler and write the report into ``folder``.
+
+    pyinstrument is used when it is installed and writes an HTML report,
+    otherwise cProfile writes a pstats file.
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    name = f"plan-{datetime.now():%Y%m%d-%H%M%S-%f}"
+    if pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            result = func()
+        finally:
+            profiler.stop()
+        path = folder / f"{name}.html"
+        path.write_text(profiler.output_html(), encoding="utf-8")
+    else:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func)
+        path = folder / f"{name}.prof"
+        profiler.dump_stats(path)
+    return result, path
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+
+class MessageBatcher:
+    """Collects messages by kind and sends them at most every ``min_interval``.
+
+    A newer message replaces a pending one of the same kind, so a client that
+    only cares about the current state gets one message per kind per batch
+    however many updates happened in between. Kinds whose messages build on
+    each other, like deltas, name a function in ``merge`` that combines the
+    pending message with the newer one instead.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict], None],
+        min_interval: float = 1.0,
+        merge: dict[str, Callable[[dict, dict], dict]] | None = None,
+    ):
+        self.send = send
+        self.min_interval = min_interval
+        self.merge = merge or {}
+        self.sent_batches = 0
+        self._lock = threading.Lock()
+        self._pending: dict[str, dict] = {}
+        self._timer: threading.Timer | None = None
+        self._last_sent = float("-inf")
+
+    def push(self, kind: str, payload: dict):
+        with self._lock:
+            pending = self._pending.get(kind)
+            if pending is not None and kind in self.merge:
+                payload = self.merge[kind](pending, payload)
+            self._pending[kind] = payload
+            if self._timer is not None:
+                return
+            delay = max(0.0, self._last_sent + self.min_interval - time.monotonic())
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return
+            messages = [
+                {"type": kind, **payload} for kind, payload in self._pending.items()
+            ]
+            self._pending.clear()
+            self._last_sent = time.monotonic()
+            self.sent_batches += 1
+        self.send({"messages": messages})
+
+    def cancel(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
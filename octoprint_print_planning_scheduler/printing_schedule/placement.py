@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+    from_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+_KEY_SECOND = 1_000_000
+
+
+def duration_key(duration: timedelta) -> int:
+    return duration // timedelta(microseconds=1)
+
+
+class FreeGapIndex:
+    """Free gaps of a DateIntervalSet, searchable by length in O(log n).
+
+    Gaps keep their position in start order. A max tree over gap lengths
+    finds the earliest gap that fits, a list sorted by (length, start) finds
+    the tightest one. Jobs are always placed at the start of a gap, so gaps
+    only shrink and never split.
+
+    Allocating updates the tree in O(log n), but moving the gap in the
+    sorted list is an O(n) memmove, which stays cheap for the few hundred
+    gaps of a planning horizon.
+    """
+
+    def __init__(self, gaps: DateIntervalSet):
+        self.tzinfo = gaps.tzinfo
+        self._starts = array("q")
+        self._ends = array("q")
+        for start, end in gaps.iter_keys():
+            self._starts.append(start)
+            self._ends.append(end)
+        count = len(self._starts)
+        self._size = 1
+        while self._size < count:
+            self._size *= 2
+        self._tree = array("q", [0]) * (2 * self._size)
+        for index in range(count):
+            self._tree[self._size + index] = self._ends[index] - self._starts[index]
+        for node in range(self._size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+        self._by_size = sorted(
+            (self._ends[i] - self._starts[i], self._starts[i], i) for i in range(count)
+        )
+
+    def __len__(self):
+        return len(self._starts)
+
+    def gap_keys(self, index: int) -> tuple[int, int]:
+        return self._starts[index], self._ends[index]
+
+    def locate(self, key: int) -> int:
+        """Index of the last gap starting at or before ``key``, or -1."""
+        return bisect_right(self._starts, key) - 1
+
+    def first_fit(self, length: int, not_before: int = 0) -> int:
+        """Index of the earliest gap from ``not_before`` on that fits, or -1."""
+        if self._tree[1] < length or not_before >= len(self._starts):
+            return -1
+        return self._leftmost_fit(1, 0, self._size, length, not_before)
+
+    def _leftmost_fit(self, node, low, high, length, not_before) -> int:
+        if high <= not_before or self._tree[node] < length:
+            return -1
+        if node >= self._size:
+            return node - self._size
+        middle = (low + high) // 2
+        found = self._leftmost_fit(2 * node, low, middle, length, not_before)
+        if found < 0:
+            found = self._leftmost_fit(2 * node + 1, middle, high, length, not_before)
+        return found
+
+    def best_fit(self, length: int) -> int:
+        """Index of the shortest gap that fits, earliest on ties, or -1."""
+        position = bisect_left(self._by_size, (length,))
+        if position == len(self._by_size):
+            return -1
+        return self._by_size[position][2]
+
+    def allocate(self, index: int, length: int) -> tuple[int, int]:
+        start, end = self._starts[index], self._ends[index]
+        old = (end - start, start, index)
+        del self._by_size[bisect_left(self._by_size, old)]
+        self._starts[index] = start + length
+        insort(self._by_size, (end - start - length, start + length, index))
+        node = self._size + index
+        self._tree[node] = end - start - length
+        node //= 2
+        while node:
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+        return start, start + length
+
+    def remaining(self, not_before: int = 0) -> DateIntervalSet:
+        """What is left of the gaps from index ``not_before`` on."""
+        pairs = zip(self._starts[not_before:], self._ends[not_before:])
+        return DateIntervalSet.from_sorted_keys(
+            ((s, e) for s, e in pairs if s < e), self.tzinfo
+        )
+
+
+@dataclass(frozen=True)
+class PlacementStrategy:
+    name: str
+    choose_gap: Callable[[FreeGapIndex, int], int]
+    # sort key for the job queue, None keeps the queue order
+    job_order: Callable[[PrintJob], object] | None = None
+
+
+FIRST_FIT = PlacementStrategy("first_fit", FreeGapIndex.first_fit)
+BEST_FIT = PlacementStrategy("best_fit", FreeGapIndex.best_fit)
+LONGEST_JOB_FIRST = PlacementStrategy(
+    "longest_job_first", FreeGapIndex.best_fit, lambda job: -job.duration
+)
+
+STRATEGIES = {s.name: s for s in (FIRST_FIT, BEST_FIT, LONGEST_JOB_FIRST)}
+
+
+@dataclass
+class Placement:
+    job: PrintJob
+    interval: DateInterval
+
+
+@dataclass
+class PlacementResult:
+    placements: list[Placement] = field(default_factory=list)
+    unscheduled: list[PrintJob] = field(default_factory=list)
+    remaining: DateIntervalSet = field(default_factory=DateIntervalSet)
+    available_time: timedelta = timedelta()
+
+    @property
+    def scheduled_time(self) -> timedelta:
+        return sum((p.interval.duration for p in self.placements), timedelta())
+
+    @property
+    def utilization(self) -> float:
+        if not self.available_time:
+            return 0.0
+        return self.scheduled_time / self.available_time
+
+    def metrics(self) -> dict:
+        largest_gap = max(
+            (end - start for start, end in self.remaining.iter_keys()), default=0
+        )
+        return {
+            "scheduled_jobs": len(self.placements),
+            "unscheduled_jobs": len(self.unscheduled),
+            "scheduled_seconds": self.scheduled_time.total_seconds(),
+            "available_seconds": self.available_time.total_seconds(),
+            "utilization": self.utilization,
+            "largest_free_gap_seconds": largest_gap / _KEY_SECOND,
+        }
+
+
+class PlacementEngine:
+    def __init__(self, strategy: str | PlacementStrategy = FIRST_FIT):
+        if isinstance(strategy, str):
+            strategy = STRATEGIES[strategy]
+        self.strategy = strategy
+
+    def place(self, jobs: list[PrintJob], free: DateIntervalSet) -> PlacementResult:
+        index = FreeGapIndex(free)
+        tz = free.tzinfo
+        order = list(range(len(jobs)))
+        if self.strategy.job_order is not None:
+            order.sort(key=lambda i: self.strategy.job_order(jobs[i]))
+
+        placed: dict[int, Placement] = {}
+        unscheduled = []
+        for i in order:
+            job = jobs[i]
+            length = duration_key(job.duration)
+            gap = self.strategy.choose_gap(index, length)
+            if gap < 0:
+                unscheduled.append(job)
+                continue
+            start, end = index.allocate(gap, length)
+            placed[i] = Placement(
+                job, DateInterval(from_key(start, tz), from_key(end, tz))
+            )
+
+        available = timedelta(
+            microseconds=sum(end - start for start, end in free.iter_keys())
+        )
+        return PlacementResult(
+            [placed[i] for i in sorted(placed)],
+            unscheduled,
+            index.remaining(),
+            available,
+        )
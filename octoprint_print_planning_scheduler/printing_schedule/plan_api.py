@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    Placement,
+    PlacementResult,
+)
+from octoprint_print_planning_scheduler.printing_schedule.planning_worker import (
+    PublishedPlan,
+)
+
+# plan versions restart at 1 with every boot, clients see them with this id
+# so a version or ETag from before a restart never matches a new plan
+EPOCH = secrets.token_hex(4)
+
+
+@dataclass(frozen=True)
+class ScheduleSnapshot:
+    """What a planning run publishes, readers never touch the live schedule."""
+
+    result: PlacementResult = field(default_factory=PlacementResult)
+    power_intervals: DateIntervalSet = field(default_factory=DateIntervalSet)
+    horizon_end: datetime | None = None
+
+
+class PlanHistory:
+    """The last ``max_versions`` published plans by version, for deltas."""
+
+    def __init__(self, max_versions: int = 32):
+        self.max_versions = max_versions
+        self._plans: OrderedDict[int, PublishedPlan[ScheduleSnapshot]] = OrderedDict()
+
+    def publish(self, published: PublishedPlan[ScheduleSnapshot]):
+        self._plans[published.version] = published
+        if len(self._plans) > self.max_versions:
+            self._plans.popitem(last=False)
+
+    @property
+    def latest(self) -> PublishedPlan[ScheduleSnapshot] | None:
+        if not self._plans:
+            return None
+        return next(reversed(self._plans.values()))
+
+    def get(self, version: int) -> PublishedPlan[ScheduleSnapshot] | None:
+        return self._plans.get(version)
+
+
+def plan_version(published: PublishedPlan) -> str:
+    return f"{EPOCH}-{published.version}"
+
+
+def parse_version(value: str | None) -> int | None:
+    """Version number of a client's ``since``, None when it is from another boot."""
+    epoch, _, version = (value or "").rpartition("-")
+    if epoch != EPOCH or not version.isdigit():
+        return None
+    return int(version)
+
+
+def etag(published: PublishedPlan) -> str:
+    return f"plan-{plan_version(published)}"
+
+
+def interval_to_dict(interval: DateInterval) -> dict:
+    return {
+        "start": interval.start.isoformat(),
+        "end": interval.end.isoformat() if interval.end is not None else None,
+    }
+
+
+def placement_to_dict(placement: Placement) -> dict:
+    return {
+        "job": placement.job.name,
+        "priority": placement.job.priority,
+        **interval_to_dict(placement.interval),
+    }
+
+
+def plan_to_dict(published: PublishedPlan[ScheduleSnapshot]) -> dict:
+    result = published.plan.result
+    return {
+        "version": plan_version(published),
+        "created": published.created.isoformat(),
+        "placements": [placement_to_dict(p) for p in result.placements],
+        "unscheduled": [job.name for job in result.unscheduled],
+        "windows": availability(published.plan),
+        "metrics": result.metrics(),
+    }
+
+
+def _placement_key(placement: Placement) -> tuple:
+    return placement.job.name, placement.interval.start, placement.interval.end
+
+
+def plan_delta(
+    old: PublishedPlan[ScheduleSnapshot], new: PublishedPlan[ScheduleSnapshot]
+) -> dict:
+    """Placements added and removed between two plans, moved jobs are both.
+
+    The power windows are only included when they changed.
+    """
+    before = {_placement_key(p): p for p in old.plan.result.placements}
+    after = {_placement_key(p): p for p in new.plan.result.placements}
+    delta = {
+        "version": plan_version(new),
+        "since": plan_version(old),
+        "added": [placement_to_dict(p) for k, p in after.items() if k not in before],
+        "removed": [placement_to_dict(p) for k, p in before.items() if k not in after],
+        "unscheduled": [job.name for job in new.plan.result.unscheduled],
+    }
+    if new.plan.power_intervals != old.plan.power_intervals:
+        delta["windows"] = availability(new.plan)
+    return delta
+
+
+def _dict_key(placement: dict) -> tuple:
+    return placement["job"], placement["start"], placement["end"]
+
+
+def merge_plan_messages(pending: dict, newer: dict) -> dict:
+    """One plan message with the changes of ``pending`` and then ``newer``.
+
+    A full plan replaces what is pending. A delta is merged into the pending
+    message it follows, so the result still starts from the pending ``since``
+    or is a full plan when ``pending`` was one.
+    """
+    if "since" not in newer or newer["since"] != pending["version"]:
+        # a client that misses the since of a delta asks for the plan itself
+        return newer
+    removed = {_dict_key(p) for p in newer["removed"]}
+    merged = {
+        **pending,
+        "version": newer["version"],
+        "unscheduled": newer["unscheduled"],
+    }
+    if "windows" in newer:
+        merged["windows"] = newer["windows"]
+    if "since" not in pending:
+        merged["placements"] = [
+            p for p in pending["placements"] if _dict_key(p) not in removed
+        ] + newer["added"]
+        # the metrics describe the plan the delta started from
+        merged.pop("metrics", None)
+        return merged
+    # a placement added by one delta and removed by the next was never seen
+    before = {_dict_key(p) for p in pending["added"]}
+    merged["added"] = [
+        p for p in pending["added"] if _dict_key(p) not in removed
+    ] + newer["added"]
+    merged["removed"] = pending["removed"] + [
+        p for p in newer["removed"] if _dict_key(p) not in before
+    ]
+    return merged
+
+
+def availability(
+    snapshot: ScheduleSnapshot,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[dict]:
+    """Power windows of the snapshot, clipped to [start, end] when given."""
+    intervals = snapshot.power_intervals.intervals
+    if intervals and (start is not None or end is not None):
+        bounds = DateInterval(start or intervals[0].start, end or intervals[-1].end)
+        intervals = snapshot.power_intervals.intersection(DateIntervalSet([bounds]))
+    return [interval_to_dict(interval) for interval in intervals]
+
+
+def next_outage(snapshot: ScheduleSnapshot, now: datetime) -> dict | None:
+    """The first time without power from ``now`` on, inside the horizon.
+
+    The end is None when power does not come back before the horizon ends.
+    """
+    gap = snapshot.power_intervals.next_gap_after(now)
+    if snapshot.horizon_end is not None and gap.start >= snapshot.horizon_end:
+        return None
+    return interval_to_dict(gap)
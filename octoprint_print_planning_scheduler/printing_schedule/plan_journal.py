@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    Placement,
+    PlacementResult,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_api import (
+    ScheduleSnapshot,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+_logger = logging.getLogger(__name__)
+
+
+def _datetime(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def job_to_record(job: PrintJob) -> dict:
+    return {
+        "name": job.name,
+        "seconds": job.duration.total_seconds(),
+        "priority": job.priority,
+        "deadline": _isoformat(job.deadline),
+        "path": job.path,
+    }
+
+
+def job_from_record(record: dict) -> PrintJob:
+    return PrintJob(
+        record["name"],
+        timedelta(seconds=record["seconds"]),
+        record["priority"],
+        _datetime(record["deadline"]),
+        record["path"],
+    )
+
+
+class PlanJournal:
+    """Job queue, urgent outages and the last plan in an append-only file.
+
+    Every change appends one JSON line, so a change never rewrites what is
+    already stored. Opening the journal replays it, a line torn by a power
+    loss ends the replay and is cut off. Once ``compact_after`` lines more
+    than the current state needs were written, the file is replaced by one
+    holding only that state, outages that already ended are dropped then.
+    """
+
+    def __init__(self, path: Path, compact_after: int = 1000, sync: bool = True):
+        self.path = Path(path)
+        self.compact_after = compact_after
+        self.sync = sync
+        self.compactions = 0
+        self._lock = threading.Lock()
+        self._jobs: dict[int, PrintJob] = {}
+        # job ids by object identity, the dict above keeps the jobs alive
+        self._ids: dict[int, int] = {}
+        self._next_id = 1
+        self._outages: list[DateInterval] = []
+        self._plan: dict | None = None
+        self._lines = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._replay()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @property
+    def jobs(self) -> list[PrintJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    @property
+    def outages(self) -> list[DateInterval]:
+        with self._lock:
+            return list(self._outages)
+
+    def snapshot(
+        self,
+        power_intervals: DateIntervalSet | None = None,
+        horizon_end: datetime | None = None,
+    ) -> ScheduleSnapshot | None:
+        """The last stored plan, its jobs are the queued ``PrintJob`` objects.
+
+        Power windows are not stored, they move with every step of the
+        horizon. The caller passes them in, rebuilt from the calendar.
+        """
+        with self._lock:
+            if self._plan is None:
+                return None
+            return self._snapshot_from_record(
+                self._plan, power_intervals or DateIntervalSet(), horizon_end
+            )
+
+    def job_added(self, job: PrintJob):
+        with self._lock:
+            job_id = self._next_id
+            self._add_job(job_id, job)
+            self._append({"op": "job", "id": job_id, "job": job_to_record(job)})
+
+    def job_removed(self, job: PrintJob):
+        with self._lock:
+            job_id = self._ids.pop(id(job), None)
+            if job_id is None:
+                return
+            del self._jobs[job_id]
+            self._append({"op": "remove", "id": job_id})
+
+    def outage_added(self, outage: DateInterval):
+        with self._lock:
+            self._outages.append(outage)
+            self._append(
+                {
+                    "op": "outage",
+                    "start": outage.start.isoformat(),
+                    "end": outage.end.isoformat(),
+                }
+            )
+
+    def plan_published(self, snapshot: ScheduleSnapshot):
+        with self._lock:
+            record = self._plan_record(snapshot)
+            # replanning often ends in the same plan, even when the horizon
+            # moved, and the same plan is stored once
+            if record != self._plan:
+                self._plan = record
+                self._append(record)
+
+    def compact(self, now: datetime | None = None):
+        with self._lock:
+            self._compact(now)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def _add_job(self, job_id: int, job: PrintJob):
+        self._jobs[job_id] = job
+        self._ids[id(job)] = job_id
+        self._next_id = max(self._next_id, job_id + 1)
+
+    def _append(self, record: dict):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+        self._lines += 1
+        # lines beyond the current state are what compaction would save
+        live = len(self._jobs) + len(self._outages) + 1
+        if self._lines > self.compact_after + live:
+            self._compact()
+
+    def _replay(self):
+        if not self.path.exists():
+            return
+        valid_size = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    _logger.warning(f"Ignoring broken end of journal {self.path}")
+                    break
+                valid_size += len(line)
+                self._lines += 1
+        if valid_size < self.path.stat().st_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_size)
+
+    def _apply(self, record: dict):
+        op = record["op"]
+        if op == "job":
+            self._add_job(record["id"], job_from_record(record["job"]))
+        elif op == "remove":
+            job = self._jobs.pop(record["id"], None)
+            if job is not None:
+                del self._ids[id(job)]
+        elif op == "outage":
+            self._outages.append(
+                DateInterval(_datetime(record["start"]), _datetime(record["end"]))
+            )
+        elif op == "plan":
+            # journals written before power windows were left out still have them
+            self._plan = {
+                "op": "plan",
+                "placements": record["placements"],
+                "unscheduled": record["unscheduled"],
+            }
+        else:
+            raise ValueError(f"unknown journal record {op}")
+
+    def _plan_record(self, snapshot: ScheduleSnapshot) -> dict:
+        def job_reference(job: PrintJob) -> dict:
+            job_id = self._ids.get(id(job))
+            if job_id is not None:
+                return {"id": job_id}
+            # jobs that are not queued, like a print added outside the queue
+            return {"job": job_to_record(job)}
+
+        result = snapshot.result
+        return {
+            "op": "plan",
+            "placements": [
+                {
+                    **job_reference(p.job),
+                    "start": p.interval.start.isoformat(),
+                    "end": p.interval.end.isoformat(),
+                }
+                for p in result.placements
+            ],
+            "unscheduled": [job_reference(job) for job in result.unscheduled],
+        }
+
+    def _snapshot_from_record(
+        self,
+        record: dict,
+        power_intervals: DateIntervalSet,
+        horizon_end: datetime | None,
+    ) -> ScheduleSnapshot:
+        def job(reference: dict) -> PrintJob | None:
+            if "id" in reference:
+                return self._jobs.get(reference["id"])
+            return job_from_record(reference["job"])
+
+        placements = []
+        for placement in record["placements"]:
+            placed = job(placement)
+            # jobs removed after the plan was stored are left out
+            if placed is not None:
+                interval = DateInterval(
+                    _datetime(placement["start"]), _datetime(placement["end"])
+                )
+                placements.append(Placement(placed, interval))
+        unscheduled = [j for j in map(job, record["unscheduled"]) if j is not None]
+        return ScheduleSnapshot(
+            PlacementResult(
+                placements,
+                unscheduled,
+                power_intervals.copy(),
+                sum((i.duration for i in power_intervals), timedelta()),
+            ),
+            power_intervals.copy(),
+            horizon_end,
+        )
+
+    def _records(self) -> list[dict]:
+        records = [
+            {"op": "job", "id": job_id, "job": job_to_record(job)}
+            for job_id, job in self._jobs.items()
+        ]
+        records += [
+            {"op": "outage", "start": o.start.isoformat(), "end": o.end.isoformat()}
+            for o in self._outages
+        ]
+        if self._plan is not None:
+            records.append(self._plan)
+        return records
+
+    def _compact(self, now: datetime | None = None):
+        now = now or datetime.now()
+        self._outages = [
+            outage
+            for outage in self._outages
+            if outage.end > (now if outage.end.tzinfo is None else now.astimezone())
+        ]
+        records = self._records()
+        temporary = self.path.with_suffix(".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(temporary, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lines = len(records)
+        self.compactions += 1
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+    from_key,
+    to_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    Placement,
+    PlacementResult,
+    duration_key,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+_SKIP = -1
+
+
+@dataclass
+class OptimizedPlacement(PlacementResult):
+    # sum of priority * scheduled duration in seconds
+    value: float = 0.0
+    # True when the search proved the plan optimal within the budget
+    complete: bool = False
+    explored: int = 0
+
+
+class PlanOptimizer:
+    """Branch-and-bound over free windows, stopped by a wall-clock budget.
+
+    Every job is either skipped or appended to one of the free windows, jobs
+    are tried in deadline order so earlier deadlines come first within a
+    window. A plan is worth the priority-weighted printing time it schedules.
+    Nodes are cut when the scheduled value plus a fractional knapsack bound
+    over the remaining jobs cannot beat the best plan found so far. The
+    search starts from a greedy plan and returns the best one seen when the
+    budget runs out.
+    """
+
+    def __init__(self, time_budget: float | timedelta = 1.0):
+        if isinstance(time_budget, timedelta):
+            time_budget = time_budget.total_seconds()
+        self.time_budget = time_budget
+
+    def optimize(
+        self, jobs: list[PrintJob], free: DateIntervalSet
+    ) -> OptimizedPlacement:
+        deadline_at = time.monotonic() + self.time_budget
+        order = sorted(
+            range(len(jobs)),
+            key=lambda i: (
+                jobs[i].deadline is None,
+                to_key(jobs[i].deadline) if jobs[i].deadline else 0,
+                -jobs[i].priority * duration_key(jobs[i].duration),
+            ),
+        )
+        lengths = [duration_key(jobs[i].duration) for i in order]
+        values = [jobs[i].priority * lengths[k] for k, i in enumerate(order)]
+        latest_ends = [
+            to_key(jobs[i].deadline) if jobs[i].deadline else None for i in order
+        ]
+        gap_starts = [start for start, _ in free.iter_keys()]
+        gap_ends = [end for _, end in free.iter_keys()]
+        # remaining jobs by value density for the fractional bound
+        by_priority = sorted(range(len(order)), key=lambda k: -jobs[order[k]].priority)
+
+        def candidates(k):
+            fitting = [
+                g
+                for g in range(len(gap_starts))
+                if gap_starts[g] + lengths[k] <= gap_ends[g]
+                and (
+                    latest_ends[k] is None
+                    or gap_starts[g] + lengths[k] <= latest_ends[k]
+                )
+            ]
+            # tightest window first finds good plans early
+            fitting.sort(key=lambda g: gap_ends[g] - gap_starts[g])
+            return iter(fitting + [_SKIP])
+
+        def bound(k):
+            capacity = sum(max(0, e - s) for s, e in zip(gap_starts, gap_ends))
+            total = 0
+            for j in by_priority:
+                if j < k or capacity <= 0:
+                    continue
+                taken = min(lengths[j], capacity)
+                total += jobs[order[j]].priority * taken
+                capacity -= taken
+            return total
+
+        best_value, best_choice = self._greedy(
+            lengths, values, latest_ends, list(gap_starts), gap_ends
+        )
+        choice = [None] * len(order)
+        value = 0
+        explored = 0
+        complete = True
+        stack = [(0, candidates(0))] if order else []
+        while stack:
+            if time.monotonic() > deadline_at:
+                complete = False
+                break
+            k, options = stack[-1]
+            if choice[k] is not None and choice[k] != _SKIP:
+                gap_starts[choice[k]] -= lengths[k]
+                value -= values[k]
+            choice[k] = None
+            option = next(options, None)
+            if option is None:
+                stack.pop()
+                continue
+            if option != _SKIP:
+                gap_starts[option] += lengths[k]
+                value += values[k]
+            choice[k] = option
+            explored += 1
+            if k + 1 == len(order):
+                if value > best_value:
+                    best_value, best_choice = value, list(choice)
+                continue
+            if value + bound(k + 1) > best_value:
+                stack.append((k + 1, candidates(k + 1)))
+
+        return self._result(
+            jobs, order, lengths, best_choice, free, best_value, complete, explored
+        )
+
+    @staticmethod
+    def _greedy(lengths, values, latest_ends, gap_starts, gap_ends):
+        value = 0
+        choice = []
+        for k, length in enumerate(lengths):
+            chosen = _SKIP
+            for g in range(len(gap_starts)):
+                end = gap_starts[g] + length
+                if end <= gap_ends[g] and (
+                    latest_ends[k] is None or end <= latest_ends[k]
+                ):
+                    chosen = g
+                    break
+            if chosen != _SKIP:
+                gap_starts[chosen] += length
+                value += values[k]
+            choice.append(chosen)
+        return value, choice
+
+    @staticmethod
+    def _result(jobs, order, lengths, choice, free, value, complete, explored):
+        tz = free.tzinfo
+        gap_starts = [start for start, _ in free.iter_keys()]
+        placed = {}
+        unscheduled = []
+        remaining = free.copy()
+        for k, g in enumerate(choice):
+            job = jobs[order[k]]
+            if g == _SKIP:
+                unscheduled.append(order[k])
+                continue
+            start = gap_starts[g]
+            gap_starts[g] += lengths[k]
+            interval = DateInterval(
+                from_key(start, tz), from_key(start + lengths[k], tz)
+            )
+            remaining.remove_interval(interval)
+            placed[order[k]] = Placement(job, interval)
+        available = timedelta(
+            microseconds=sum(end - start for start, end in free.iter_keys())
+        )
+        return OptimizedPlacement(
+            [placed[i] for i in sorted(placed)],
+            [jobs[i] for i in sorted(unscheduled)],
+            remaining,
+            available,
+            value=value / 1_000_000,
+            complete=complete,
+            explored=explored,
+        )
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PublishedPlan(Generic[T]):
+    version: int
+    created: datetime
+    plan: T
+
+
+class PlanningWorker(Generic[T]):
+    """Runs ``plan`` on a daemon thread whenever a re-plan was requested.
+
+    Requests only wake the worker, planning starts once no new request came
+    in for ``debounce`` seconds, or ``max_delay`` seconds after the first one
+    of a burst, so a burst of events costs one planning run. Finished plans
+    replace ``latest`` in a single assignment and are never changed after,
+    readers on other threads can use them without locking.
+    """
+
+    def __init__(
+        self,
+        plan: Callable[[], T],
+        debounce: float = 0.5,
+        max_delay: float = 5.0,
+        on_publish: Callable[[PublishedPlan[T]], None] | None = None,
+    ):
+        self.plan = plan
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.on_publish = on_publish
+        self.latest: PublishedPlan[T] | None = None
+        self.requests = 0
+        self.runs = 0
+        self._version = 0
+        self._condition = threading.Condition()
+        self._first_request: float | None = None
+        self._last_request: float | None = None
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        with self._condition:
+            self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="PlanningWorker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request(self):
+        with self._condition:
+            now = time.monotonic()
+            self.requests += 1
+            if self._first_request is None:
+                self._first_request = now
+            self._last_request = now
+            self._condition.notify()
+
+    def publish(self, plan: T) -> PublishedPlan[T]:
+        """Publish a plan made elsewhere, like one restored after a restart."""
+        with self._condition:
+            self._version += 1
+            published = PublishedPlan(self._version, datetime.now(), plan)
+        self.latest = published
+        if self.on_publish is not None:
+            self.on_publish(published)
+        return published
+
+    def _wait_for_requests(self) -> bool:
+        with self._condition:
+            while self._first_request is None and not self._stopping:
+                self._condition.wait()
+            while not self._stopping:
+                quiet_at = self._last_request + self.debounce
+                due = min(quiet_at, self._first_request + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            self._first_request = self._last_request = None
+            return not self._stopping
+
+    def _run(self):
+        while self._wait_for_requests():
+            try:
+                plan = self.plan()
+            except Exception:
+                _logger.exception("Planning failed")
+                continue
+            self.runs += 1
+            self.publish(plan)
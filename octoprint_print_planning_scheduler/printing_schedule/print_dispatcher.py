@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+from typing import Callable
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.deadline_dispatcher import (
+    DeadlineDispatcher,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_api import (
+    ScheduleSnapshot,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_journal import (
+    PlanJournal,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+_START = "start"
+_PAUSE = "pause"
+
+
+class PrintDispatcher:
+    """Starts queued jobs at their planned time and guards running prints.
+
+    Only two deadlines exist at any time: the start of the first planned job
+    that has a file and a pause shortly before the next outage when the
+    running print would not finish in time. Both live in one
+    ``DeadlineDispatcher``. Every change to the queue or the running print
+    asks for a new plan through ``on_change``. With a ``journal`` the queue
+    starts from the stored jobs and every change to it is stored.
+    """
+
+    def __init__(
+        self,
+        deadlines: DeadlineDispatcher,
+        is_ready: Callable[[], bool],
+        start_print: Callable[[PrintJob], None],
+        pause_print: Callable[[], None],
+        on_change: Callable[[], None],
+        pause_margin: timedelta = timedelta(minutes=1),
+        journal: PlanJournal | None = None,
+    ):
+        self.deadlines = deadlines
+        self.is_ready = is_ready
+        self.start_print = start_print
+        self.pause_print = pause_print
+        self.on_change = on_change
+        self.pause_margin = pause_margin
+        self.journal = journal
+        self.holds = 0
+        self._lock = threading.Lock()
+        self._queue: list[PrintJob] = journal.jobs if journal is not None else []
+        self._running: PrintJob | None = None
+        self._running_until: datetime | None = None
+        self._snapshot = ScheduleSnapshot()
+
+    @property
+    def running(self) -> PrintJob | None:
+        return self._running
+
+    @property
+    def running_until(self) -> datetime | None:
+        """When the running print is expected to end, None when idle."""
+        return self._running_until
+
+    def queued_jobs(self) -> list[PrintJob]:
+        with self._lock:
+            return list(self._queue)
+
+    def enqueue(self, job: PrintJob):
+        with self._lock:
+            self._queue.append(job)
+        if self.journal is not None:
+            self.journal.job_added(job)
+        self.on_change()
+
+    def remove(self, job: PrintJob):
+        with self._lock:
+            if job in self._queue:
+                self._queue.remove(job)
+        if self.journal is not None:
+            self.journal.job_removed(job)
+        self.on_change()
+
+    def busy_interval(self, now: datetime) -> DateInterval | None:
+        """Time the running print still needs, None when the printer is idle."""
+        until = self._running_until
+        if self._running is None or until is None or until <= now:
+            return None
+        return DateInterval(now, until)
+
+    def plan_published(self, snapshot: ScheduleSnapshot, now: datetime | None = None):
+        self._snapshot = snapshot
+        if self._running is not None:
+            # an urgent outage or a moved horizon can change when to pause
+            self.deadlines.cancel(_PAUSE)
+            self._guard_running_print(now or datetime.now())
+        for placement in snapshot.result.placements:
+            if placement.job.path is not None:
+                job = placement.job
+                self.deadlines.schedule(
+                    _START, placement.interval.start, lambda: self._start(job)
+                )
+                return
+        self.deadlines.cancel(_START)
+
+    def print_started(self, path: str, now: datetime):
+        with self._lock:
+            job = next((j for j in self._queue if j.path == path), None)
+            if job is not None:
+                self._queue.remove(job)
+        if job is not None and self.journal is not None:
+            self.journal.job_removed(job)
+        self._running = job
+        self._running_until = now + job.duration if job is not None else None
+        self._guard_running_print(now)
+        self.on_change()
+
+    def print_finished(self):
+        # PrintDone, PrintFailed and PrintCancelled all free the printer
+        self._running = None
+        self._running_until = None
+        self.deadlines.cancel(_PAUSE)
+        self.on_change()
+
+    def _start(self, job: PrintJob):
+        now = datetime.now()
+        if self._running is not None or not self.is_ready():
+            # the next plan is published when the printer becomes free
+            return
+        if self._snapshot.power_intervals.covering(now, now + job.duration) is None:
+            # the print would be cut by an outage, hold it until it is replanned
+            self.holds += 1
+            self.on_change()
+            return
+        self.start_print(job)
+
+    def _guard_running_print(self, now: datetime):
+        horizon_end = self._snapshot.horizon_end
+        if horizon_end is None:
+            return
+        outage = self._snapshot.power_intervals.next_gap_after(now)
+        if outage.start >= horizon_end:
+            return
+        if self._running_until is not None and self._running_until <= outage.start:
+            return
+        self.deadlines.schedule(
+            _PAUSE, outage.start - self.pause_margin, self.pause_print
+        )
@@ -1,8 +1,16 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 
 @dataclass
 class PrintJob:
     name: str
     duration: timedelta
+    # weight of the job when plans are compared, higher is more important
+    priority: int = 1
+    # latest time the print has to be finished
+    deadline: datetime | None = None
+    # file to print when the job is started automatically
+    path: str | None = None
@@ -1,56 +1,112 @@
 from __future__ import annotations
 
 import datetime
-from icalendar import Calendar
 from datetime import timedelta, datetime
 
+from octoprint_print_planning_scheduler.printing_schedule.calendar_cache import (
+    CalendarCache,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.incremental_planner import (
+    IncrementalPlanner,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+    SingleEvent,
+)
+from octoprint_print_planning_scheduler.printing_schedule.instrumentation import (
+    metrics,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    FIRST_FIT,
+    PlacementEngine,
+    PlacementResult,
+    PlacementStrategy,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_optimizer import (
+    PlanOptimizer,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+from octoprint_print_planning_scheduler.printing_schedule.rolling_horizon import (
+    RollingHorizon,
+)
+
 
 class PrintSchedule:
-    def __init__(self, ical_file):
+    def __init__(
+        self,
+        ical_file,
+        calendar_cache: CalendarCache | None = None,
+        horizon: timedelta = timedelta(days=1),
+        calendar: InfiniteCalendar | None = None,
+    ):
         self.ical_file = ical_file
-        self.power_intervals = []
+        self.calendar_cache = calendar_cache
+        self.calendar = calendar if calendar is not None else InfiniteCalendar()
+        self.horizon = RollingHorizon(self.calendar, horizon)
         self.jobs = []
-        self.load_ical()
+        # a calendar from elsewhere, like a subscription, replaces the file
+        if calendar is not None:
+            self.calculate_power_intervals()
+        else:
+            self.load_ical()
+
+    @property
+    def power_intervals(self) -> DateIntervalSet:
+        return self.horizon.power_intervals
 
     def load_ical(self):
-        with open(self.ical_file, "rb") as f:
-            gcal = Calendar.from_ical(f.read())
-            outages = []
-            for component in gcal.walk():
-                if component.name == "VEVENT":
-                    start = component.get("dtstart").dt
-                    end = component.get("dtend").dt
-                    outages.append((start, end))
-
-            outages.sort()
-            self.calculate_power_intervals(outages)
-
-    def calculate_power_intervals(self, outages):
-        current_time = datetime.now()
-        for start, end in outages:
-            if start > current_time:
-                self.power_intervals.append((current_time, start))
-            current_time = end
-        if current_time < datetime.now() + timedelta(
-            days=1
-        ):  # Assuming 24-hour scheduling window
-            self.power_intervals.append(
-                (current_time, datetime.now() + timedelta(days=1))
-            )
+        self.calendar = InfiniteCalendar.from_file(self.ical_file, self.calendar_cache)
+        self.calculate_power_intervals()
+
+    def calculate_power_intervals(self, now: datetime | None = None):
+        # one timestamp for the whole window, so it cannot shift while computing
+        self.horizon = RollingHorizon(self.calendar, self.horizon.length)
+        self.horizon.reset(now)
+
+    def advance_horizon(self, now: datetime | None = None) -> DateIntervalSet:
+        return self.horizon.advance(now)
 
     def add_urgent_outage(self, start, end):
-        self.power_intervals = []
-        self.calculate_power_intervals([(start, end)])
-
-    def add_job(self, job_duration):
-        self.jobs.append(job_duration)
-
-    def schedule_jobs(self):
-        scheduled_jobs = []
-        for job_duration in self.jobs:
-            for i, (start, end) in enumerate(self.power_intervals):
-                if end - start >= job_duration:
-                    scheduled_jobs.append((start, start + job_duration))
-                    self.power_intervals[i] = (start + job_duration, end)
-                    break
-        return scheduled_jobs
+        # only the affected power interval is cut, the rest of the plan stays
+        self.calendar.add_event(SingleEvent(start, end))
+        self.power_intervals.remove_interval(DateInterval(start, end))
+
+    def add_job(self, job: PrintJob | timedelta):
+        if not isinstance(job, PrintJob):
+            job = PrintJob(f"job {len(self.jobs) + 1}", job)
+        self.jobs.append(job)
+
+    @metrics.timed("schedule.plan_jobs")
+    def plan_jobs(
+        self,
+        strategy: str | PlacementStrategy = FIRST_FIT,
+        time_budget: float | None = None,
+        busy: DateInterval | None = None,
+    ) -> PlacementResult:
+        free = self.power_intervals
+        if busy is not None:
+            # time taken by a print that is already running
+            free = free.copy()
+            free.remove_interval(busy)
+        # with a time budget the plan is optimized instead of placed greedily
+        if time_budget is not None:
+            result = PlanOptimizer(time_budget).optimize(self.jobs, free)
+        else:
+            result = PlacementEngine(strategy).place(self.jobs, free)
+        metrics.count("jobs_placed", len(result.placements))
+        metrics.count("jobs_unscheduled", len(result.unscheduled))
+        return result
+
+    def schedule_jobs(self, strategy: str | PlacementStrategy = FIRST_FIT):
+        # power_intervals is left untouched so the schedule can be planned again
+        result = self.plan_jobs(strategy)
+        return [(p.interval.start, p.interval.end) for p in result.placements]
+
+    def incremental_planner(self) -> IncrementalPlanner:
+        return IncrementalPlanner(self.power_intervals, self.jobs)
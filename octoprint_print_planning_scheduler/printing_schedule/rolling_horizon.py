@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+from typing import Callable
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+)
+
+
+class RollingHorizon:
+    """Power intervals from now up to a fixed distance into the future.
+
+    ``advance`` drops the time that has passed from the front of
+    ``power_intervals`` and expands the calendar only for the time that came
+    into view at the back, so each step costs the same however long the
+    horizon has been rolling.
+    """
+
+    def __init__(
+        self, calendar: InfiniteCalendar, length: timedelta = timedelta(days=1)
+    ):
+        self.calendar = calendar
+        self.length = length
+        self.start: datetime | None = None
+        self.end: datetime | None = None
+        self.power_intervals = DateIntervalSet()
+        self._lookback_version = None
+        self._lookback = timedelta()
+
+    def reset(self, now: datetime | None = None):
+        now = now or datetime.now()
+        self.start = self.end = now
+        self.power_intervals = DateIntervalSet()
+        self._append(now + self.length)
+
+    def advance(self, now: datetime | None = None) -> DateIntervalSet:
+        """Move the horizon to ``now`` and return the power time that was added."""
+        if self.start is None:
+            self.reset(now)
+            return self.power_intervals.copy()
+        now = now or datetime.now()
+        if now > self.start:
+            self.power_intervals.remove_interval(DateInterval(self.start, now))
+            self.start = now
+            self.end = max(self.end, now)
+        return self._append(now + self.length)
+
+    def _append(self, new_end: datetime) -> DateIntervalSet:
+        if new_end <= self.end:
+            return DateIntervalSet()
+        tail = DateInterval(self.end, new_end)
+        # occurrences starting before the tail can still reach into it
+        outages = self.calendar.generate_intervals_for_period(
+            DateInterval(self.end - self._longest_event(), new_end)
+        )
+        added = DateIntervalSet([tail]).difference(outages)
+        for interval in added:
+            self.power_intervals.add(interval)
+        self.end = new_end
+        return added
+
+    def _longest_event(self) -> timedelta:
+        if self._lookback_version != self.calendar.version:
+            self._lookback = max(
+                (
+                    event.end - event.start
+                    for event in self.calendar.events
+                    if getattr(event, "recurrence", None) is not None
+                ),
+                default=timedelta(),
+            )
+            self._lookback_version = self.calendar.version
+        return self._lookback
+
+
+class HorizonTimer:
+    """Calls ``advance`` every ``interval`` on a daemon thread until stopped."""
+
+    def __init__(self, advance: Callable[[], object], interval: float | timedelta):
+        if isinstance(interval, timedelta):
+            interval = interval.total_seconds()
+        self.advance = advance
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="HorizonTimer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.advance()
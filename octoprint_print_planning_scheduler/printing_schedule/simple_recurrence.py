@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterator
+
+_STEPS = {
+    "WEEKLY": timedelta(weeks=1),
+    "DAILY": timedelta(days=1),
+    "HOURLY": timedelta(hours=1),
+    "MINUTELY": timedelta(minutes=1),
+}
+
+# anything else (BYDAY, BYMONTH, BYSETPOS, ...) needs the general rrule iterator
+_SIMPLE_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "WKST"}
+
+
+def _wall(value: datetime, tz) -> datetime:
+    # wall clock time in the recurrence timezone, rrule steps in wall time
+    if tz is not None:
+        value = value.astimezone(tz)
+    return value.replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class SimpleRecurrence:
+    """Closed form of an RRULE without BY* parts: dtstart + k * step.
+
+    Implements the part of the dateutil rrule interface used by
+    ``RecurringEvent`` and finds the first occurrence of any window
+    arithmetically instead of iterating from dtstart.
+    """
+
+    dtstart: datetime
+    step: timedelta
+    count: int | None = None
+    until: datetime | None = None
+
+    @classmethod
+    def from_rrule(cls, dtstart: datetime, rule: dict) -> SimpleRecurrence | None:
+        if not set(rule) <= _SIMPLE_PARTS or not isinstance(dtstart, datetime):
+            return None
+        freq = rule["FREQ"][0]
+        if freq not in _STEPS:
+            return None
+        interval = rule.get("INTERVAL", [1])[0]
+        count = rule.get("COUNT", [None])[0]
+        until = rule.get("UNTIL", [None])[0]
+        if isinstance(until, date) and not isinstance(until, datetime):
+            # all-day rules end on a date, occurrences on that day still count
+            until = datetime.combine(until, time(23, 59, 59), dtstart.tzinfo)
+        if until is not None and (
+            not isinstance(until, datetime)
+            or (until.tzinfo is None) != (dtstart.tzinfo is None)
+        ):
+            return None
+        return cls(dtstart, _STEPS[freq] * interval, count, until)
+
+    def _occurrence(self, index: int) -> datetime:
+        return self.dtstart + self.step * index
+
+    def _is_valid(self, index: int) -> bool:
+        if self.count is not None and index >= self.count:
+            return False
+        return self.until is None or self._occurrence(index) <= self.until
+
+    def _first_index(self, after: datetime, inc: bool) -> int:
+        offset = _wall(after, self.dtstart.tzinfo) - self.dtstart.replace(tzinfo=None)
+        index = max(0, -(-offset // self.step))
+        # wall time and real time can disagree around DST changes
+        while index > 0 and self._is_after(self._occurrence(index - 1), after, inc):
+            index -= 1
+        while not self._is_after(self._occurrence(index), after, inc):
+            index += 1
+        return index
+
+    @staticmethod
+    def _is_after(occurrence: datetime, after: datetime, inc: bool) -> bool:
+        return occurrence >= after if inc else occurrence > after
+
+    def xafter(
+        self, dt: datetime, count: int | None = None, inc: bool = False
+    ) -> Iterator[datetime]:
+        index = self._first_index(dt, inc)
+        produced = 0
+        while self._is_valid(index) and (count is None or produced < count):
+            yield self._occurrence(index)
+            index += 1
+            produced += 1
+
+    def between(
+        self, after: datetime, before: datetime, inc: bool = False
+    ) -> list[datetime]:
+        result = []
+        for occurrence in self.xafter(after, inc=inc):
+            if occurrence > before or (not inc and occurrence == before):
+                break
+            result.append(occurrence)
+        return result
@@ -5,25 +5,188 @@
  * License: AGPLv3
  */
 $(function() {
+    var PLUGIN_ID = "print_planning_scheduler";
+    var HOUR = 60 * 60 * 1000;
+
+    // index of the first item whose end is after time, items are sorted by start
+    function firstVisible(items, time) {
+        var low = 0, high = items.length;
+        while (low < high) {
+            var middle = (low + high) >> 1;
+            if (items[middle].end <= time) {
+                low = middle + 1;
+            } else {
+                high = middle;
+            }
+        }
+        return low;
+    }
+
+    function toItem(placement) {
+        return {
+            job: placement.job,
+            start: Date.parse(placement.start),
+            end: Date.parse(placement.end)
+        };
+    }
+
+    function itemKey(item) {
+        return item.job + "|" + item.start + "|" + item.end;
+    }
+
     function Print_planning_schedulerViewModel(parameters) {
         var self = this;
 
-        // assign the injected parameters, e.g.:
-        // self.loginStateViewModel = parameters[0];
-        // self.settingsViewModel = parameters[1];
+        self.version = ko.observable(null);
+        self.outage = ko.observable(null);
+        self.unscheduled = ko.observableArray([]);
+        self.scheduledCount = ko.observable(0);
+
+        // plain arrays, thousands of blocks must not become observables
+        self.placements = [];
+        self.windows = [];
+        self.viewStart = Date.now();
+        self.viewSpan = 12 * HOUR;
+        self.canvas = null;
+        self.renderPending = false;
+
+        self.nextOutageText = ko.pureComputed(function() {
+            var outage = self.outage();
+            if (!outage) {
+                return gettext("No outage within the planning horizon");
+            }
+            return new Date(outage.start).toLocaleString();
+        });
+
+        self.fetchPlan = function() {
+            var url = OctoPrint.getBlueprintUrl(PLUGIN_ID) + "plan";
+            if (self.version() !== null) {
+                url += "?since=" + encodeURIComponent(self.version());
+            }
+            OctoPrint.get(url).done(self.applyPlan);
+        };
+
+        self.applyPlan = function(plan) {
+            if (plan.since === undefined) {
+                self.placements = plan.placements.map(toItem);
+            } else if (plan.since === self.version()) {
+                var removed = {};
+                plan.removed.forEach(function(placement) {
+                    removed[itemKey(toItem(placement))] = true;
+                });
+                self.placements = self.placements
+                    .filter(function(item) { return !removed[itemKey(item)]; })
+                    .concat(plan.added.map(toItem));
+            } else {
+                // a batch was missed, ask for the delta from what we have
+                self.fetchPlan();
+                return;
+            }
+            self.placements.sort(function(a, b) { return a.start - b.start; });
+            // deltas only carry the power windows when they changed
+            if (plan.windows !== undefined) {
+                self.windows = plan.windows.map(function(interval) {
+                    return {job: null, start: Date.parse(interval.start), end: Date.parse(interval.end)};
+                });
+            }
+            self.version(plan.version);
+            self.unscheduled(plan.unscheduled);
+            self.scheduledCount(self.placements.length);
+            self.requestRender();
+        };
+
+        self.onDataUpdaterPluginMessage = function(plugin, data) {
+            if (plugin !== PLUGIN_ID) {
+                return;
+            }
+            data.messages.forEach(function(message) {
+                if (message.type === "plan") {
+                    self.applyPlan(message);
+                } else if (message.type === "outage") {
+                    self.outage(message.outage);
+                }
+            });
+        };
+
+        self.requestRender = function() {
+            if (self.renderPending || !self.canvas) {
+                return;
+            }
+            self.renderPending = true;
+            window.requestAnimationFrame(function() {
+                self.renderPending = false;
+                self.render();
+            });
+        };
+
+        self.drawRange = function(context, items, color, width, height, top) {
+            var viewEnd = self.viewStart + self.viewSpan;
+            var scale = width / self.viewSpan;
+            context.fillStyle = color;
+            // only the items overlapping the visible window are drawn
+            for (var i = firstVisible(items, self.viewStart); i < items.length; i++) {
+                var item = items[i];
+                if (item.start >= viewEnd) {
+                    break;
+                }
+                var x = Math.max(0, (item.start - self.viewStart) * scale);
+                var right = Math.min(width, (item.end - self.viewStart) * scale);
+                context.fillRect(x, top, Math.max(1, right - x), height);
+                if (item.job && right - x > 40) {
+                    context.fillStyle = "#fff";
+                    context.fillText(item.job, x + 3, top + height / 2 + 4, right - x - 6);
+                    context.fillStyle = color;
+                }
+            }
+        };
+
+        self.render = function() {
+            var canvas = self.canvas;
+            var width = canvas.width = canvas.clientWidth;
+            var height = canvas.height;
+            var context = canvas.getContext("2d");
+            context.clearRect(0, 0, width, height);
+            self.drawRange(context, self.windows, "#dff0d8", width, height, 0);
+            self.drawRange(context, self.placements, "#337ab7", width, height - 16, 8);
+        };
+
+        self.pan = function(milliseconds) {
+            self.viewStart += milliseconds;
+            self.requestRender();
+        };
+
+        self.zoom = function(factor) {
+            var center = self.viewStart + self.viewSpan / 2;
+            self.viewSpan = Math.min(14 * 24 * HOUR, Math.max(HOUR, self.viewSpan * factor));
+            self.viewStart = center - self.viewSpan / 2;
+            self.requestRender();
+        };
+
+        self.panEarlier = function() { self.pan(-self.viewSpan / 4); };
+        self.panLater = function() { self.pan(self.viewSpan / 4); };
+        self.zoomIn = function() { self.zoom(0.5); };
+        self.zoomOut = function() { self.zoom(2); };
+
+        self.onStartup = function() {
+            self.canvas = document.getElementById("print_planning_scheduler_timeline");
+            $(window).on("resize", self.requestRender);
+        };
+
+        self.onAfterTabChange = function(current, previous) {
+            // a hidden tab has no width, draw again once it is shown
+            if (current === "#tab_plugin_print_planning_scheduler") {
+                self.requestRender();
+            }
+        };
 
-        // TODO: Implement your plugin's view model here.
+        self.onUserLoggedIn = function() {
+            self.fetchPlan();
+        };
     }
 
-    /* view model class, parameters for constructor, container to bind to
-     * Please see http://docs.octoprint.org/en/master/plugins/viewmodels.html#registering-custom-viewmodels for more details
-     * and a full list of the available options.
-     */
     OCTOPRINT_VIEWMODELS.push({
         construct: Print_planning_schedulerViewModel,
-        // ViewModels your plugin depends on, e.g. loginStateViewModel, settingsViewModel, ...
-        dependencies: [ /* "loginStateViewModel", "settingsViewModel" */ ],
-        // Elements to bind to, e.g. #settings_plugin_print_planning_scheduler, #tab_plugin_print_planning_scheduler, ...
-        elements: [ /* ... */ ]
+        dependencies: [],
+        elements: ["#tab_plugin_print_planning_scheduler"]
     });
 });
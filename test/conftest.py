@@ -1,8 +1,61 @@
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from pytest import fixture
+from pytest import fixture, skip
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+# planning tests count hours from this day
+DAY = datetime(2024, 7, 1)
+
+
+def at(hours):
+    return DAY + timedelta(hours=hours)
+
+
+def span(start, end):
+    return DateInterval(at(start), at(end))
+
+
+def free_time(*hours):
+    """Free time made of (start, end) pairs of hours after ``DAY``."""
+    return DateIntervalSet(span(start, end) for start, end in hours)
+
+
+def make_job(name, hours):
+    return PrintJob(name, timedelta(hours=hours))
+
+
+def wait_for(condition, timeout=2.0):
+    """Polls ``condition`` until it holds, failing after ``timeout`` seconds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
 
 
 @fixture
 def data_folder():
     return Path(__file__).parent / "data"
+
+
+@fixture
+def local_timezone(monkeypatch):
+    """Sets the local timezone naive datetimes are interpreted in."""
+    if not hasattr(time, "tzset"):
+        skip("the local timezone can only be changed on Unix")
+
+    def set_timezone(name):
+        monkeypatch.setenv("TZ", name)
+        time.tzset()
+
+    yield set_timezone
+    monkeypatch.undo()
+    time.tzset()
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import List
 from unittest.mock import mock_open, patch
@@ -20,7 +20,7 @@ ICAL_DATETIME_FORMAT = "%Y%m%dT%H%M%S"
 
 @fixture
 def calendar_test_data():
-    recurring = DateInterval(datetime(2024, 7, 1, 9, 0), datetime(2024, 7, 20, 12, 0))
+    recurring = DateInterval(datetime(2024, 7, 1, 10, 0), datetime(2024, 7, 1, 11, 0))
     single = DateInterval(datetime(2024, 7, 1, 15, 0), datetime(2024, 7, 1, 15, 30))
     return (
         "BEGIN:VCALENDAR\r\n"
@@ -137,3 +137,194 @@ def test_infinite_calendar_from_file(calendar_test_data):
     assert interval_set.intervals == [
         DateInterval(datetime(2024, 7, 1, 15, 0), datetime(2024, 7, 1, 15, 30))
     ]
+
+
+def test_iter_intervals_merges_events_in_time_order():
+    start = datetime(2024, 7, 1, 10, 0)
+    calendar = InfiniteCalendar(
+        [
+            RecurringEvent(
+                start,
+                start + timedelta(hours=1),
+                rrulestr("FREQ=DAILY", dtstart=start),
+            ),
+            RecurringEvent(
+                start,
+                start + timedelta(minutes=30),
+                rrulestr("FREQ=HOURLY;INTERVAL=12", dtstart=start + timedelta(hours=1)),
+            ),
+            SingleEvent(datetime(2024, 7, 2, 9, 0), datetime(2024, 7, 2, 10, 30)),
+        ]
+    )
+    intervals = calendar.iter_intervals(datetime(2024, 7, 1, 12, 0))
+
+    assert next(intervals) == DateInterval(
+        datetime(2024, 7, 1, 23, 0), datetime(2024, 7, 1, 23, 30)
+    )
+    assert next(intervals) == DateInterval(
+        datetime(2024, 7, 2, 9, 0), datetime(2024, 7, 2, 11, 30)
+    )
+    assert next(intervals) == DateInterval(
+        datetime(2024, 7, 2, 23, 0), datetime(2024, 7, 2, 23, 30)
+    )
+
+
+def test_iter_intervals_clips_occurrence_in_progress():
+    start = datetime(2024, 7, 1, 10, 0)
+    calendar = InfiniteCalendar(
+        [
+            RecurringEvent(
+                start,
+                start + timedelta(hours=2),
+                rrulestr("FREQ=DAILY", dtstart=start),
+            ),
+        ]
+    )
+    intervals = calendar.iter_intervals(datetime(2024, 7, 2, 11, 0))
+
+    assert next(intervals) == DateInterval(
+        datetime(2024, 7, 2, 11, 0), datetime(2024, 7, 2, 12, 0)
+    )
+    assert next(intervals) == DateInterval(
+        datetime(2024, 7, 3, 10, 0), datetime(2024, 7, 3, 12, 0)
+    )
+
+
+def test_iter_intervals_matches_period_expansion():
+    start = datetime(2024, 7, 1, 10, 0)
+    calendar = InfiniteCalendar(
+        [
+            RecurringEvent(
+                start,
+                start + timedelta(hours=3),
+                rrulestr("FREQ=HOURLY;INTERVAL=7", dtstart=start),
+            ),
+            SingleEvent(datetime(2024, 7, 3, 1, 0), datetime(2024, 7, 3, 2, 0)),
+        ]
+    )
+    period = DateInterval(datetime(2024, 7, 1), datetime(2024, 7, 5))
+
+    assert (
+        list(calendar.iter_intervals(period.start, period.end))
+        == calendar.generate_intervals_for_period(period).intervals
+    )
+
+
+MIXED_FEED = (
+    "BEGIN:VCALENDAR\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART;TZID=Europe/Berlin:20240324T100000\r\n"
+    "DTEND;TZID=Europe/Berlin:20240324T110000\r\n"
+    "RRULE:FREQ=WEEKLY\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20240325T080000Z\r\n"
+    "DTEND:20240325T090000Z\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20240326T120000\r\n"
+    "DTEND:20240326T130000\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART;VALUE=DATE:20240327\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_mixed_feed_expands_in_utc(tmp_path, local_timezone):
+    local_timezone("UTC")
+    path = tmp_path / "mixed.ics"
+    path.write_text(MIXED_FEED, newline="")
+    expected = [
+        # 10:00 in Berlin is 09:00 UTC in winter and 08:00 UTC in summer
+        DateInterval(_utc(2024, 3, 24, 9), _utc(2024, 3, 24, 10)),
+        DateInterval(_utc(2024, 3, 25, 8), _utc(2024, 3, 25, 9)),
+        DateInterval(_utc(2024, 3, 26, 12), _utc(2024, 3, 26, 13)),
+        # an all-day event without DTEND lasts the whole local day
+        DateInterval(_utc(2024, 3, 27), _utc(2024, 3, 28)),
+        DateInterval(_utc(2024, 3, 31, 8), _utc(2024, 3, 31, 9)),
+    ]
+    period = DateInterval(_utc(2024, 3, 20), _utc(2024, 4, 1))
+
+    for calendar in (
+        InfiniteCalendar.from_file(path),
+        InfiniteCalendar.from_stream(path),
+    ):
+        assert calendar.generate_intervals_for_period(period).intervals == expected
+        assert list(calendar.iter_intervals(period.start, period.end)) == expected
+
+
+def test_naive_period_over_aware_events(local_timezone):
+    local_timezone("Europe/Berlin")
+    start = datetime(2024, 3, 30, 10, tzinfo=timezone.utc)
+    calendar = InfiniteCalendar(
+        [
+            RecurringEvent(
+                start,
+                start + timedelta(hours=1),
+                rrulestr("FREQ=DAILY", dtstart=start),
+            ),
+        ]
+    )
+
+    # local wall time moves from UTC+1 to UTC+2 on 31 March
+    assert calendar.generate_intervals_for_period(
+        DateInterval(datetime(2024, 3, 30), datetime(2024, 4, 1))
+    ).intervals == [
+        DateInterval(datetime(2024, 3, 30, 11), datetime(2024, 3, 30, 12)),
+        DateInterval(datetime(2024, 3, 31, 12), datetime(2024, 3, 31, 13)),
+    ]
+
+
+UNTIL_FEED = (
+    "BEGIN:VCALENDAR\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART;VALUE=DATE:20240301\r\n"
+    "RRULE:FREQ=WEEKLY;BYDAY=FR;UNTIL=20240315T000000Z\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART;VALUE=DATE:20240302\r\n"
+    "RRULE:FREQ=WEEKLY;UNTIL=20240309T000000Z\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART;TZID=Europe/Berlin:20240304T100000\r\n"
+    "DTEND;TZID=Europe/Berlin:20240304T110000\r\n"
+    "RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20240311T100000\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART;TZID=Europe/Berlin:20240305T100000\r\n"
+    "DTEND;TZID=Europe/Berlin:20240305T110000\r\n"
+    "RRULE:FREQ=WEEKLY;UNTIL=20240312T100000\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_until_of_another_kind_than_dtstart(tmp_path, local_timezone):
+    local_timezone("UTC")
+    path = tmp_path / "until.ics"
+    path.write_text(UNTIL_FEED, newline="")
+    expected = [
+        # an UNTIL at midnight UTC still ends the all-day rules on that day
+        DateInterval(_utc(2024, 3, 1), _utc(2024, 3, 3)),
+        # a floating UNTIL is read in the timezone of DTSTART
+        DateInterval(_utc(2024, 3, 4, 9), _utc(2024, 3, 4, 10)),
+        DateInterval(_utc(2024, 3, 5, 9), _utc(2024, 3, 5, 10)),
+        DateInterval(_utc(2024, 3, 8), _utc(2024, 3, 10)),
+        DateInterval(_utc(2024, 3, 11, 9), _utc(2024, 3, 11, 10)),
+        DateInterval(_utc(2024, 3, 12, 9), _utc(2024, 3, 12, 10)),
+        DateInterval(_utc(2024, 3, 15), _utc(2024, 3, 16)),
+    ]
+    period = DateInterval(_utc(2024, 3, 1), _utc(2024, 4, 1))
+
+    for calendar in (
+        InfiniteCalendar.from_file(path),
+        InfiniteCalendar.from_stream(path),
+    ):
+        assert all(event.finite for event in calendar.events)
+        assert calendar.generate_intervals_for_period(period).intervals == expected
@@ -0,0 +1,63 @@
+import os
+import shutil
+
+from pytest import fixture
+
+from octoprint_print_planning_scheduler.printing_schedule.calendar_cache import (
+    CalendarCache,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+    RecurringEvent,
+    SingleEvent,
+)
+
+
+@fixture
+def calendar_file(data_folder, tmp_path):
+    path = tmp_path / "calendar.ics"
+    shutil.copy(data_folder / "minimal_calendar.ics", path)
+    return path
+
+
+def test_unchanged_file_is_parsed_once(calendar_file):
+    cache = CalendarCache()
+    first = InfiniteCalendar.from_file(calendar_file, cache)
+    second = InfiniteCalendar.from_file(calendar_file, cache)
+
+    assert cache.parses == 1
+    assert [type(e) for e in second.events] == [RecurringEvent, SingleEvent]
+    assert first.events is not second.events
+
+
+def test_touched_file_with_same_content_is_not_reparsed(calendar_file):
+    cache = CalendarCache()
+    cache.load(calendar_file)
+    stat = os.stat(calendar_file)
+    os.utime(calendar_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cache.load(calendar_file)
+
+    assert cache.parses == 1
+
+
+def test_changed_file_is_reparsed(calendar_file):
+    cache = CalendarCache()
+    cache.load(calendar_file)
+    content = calendar_file.read_bytes()
+    start = content.index(b"BEGIN:VEVENT", content.index(b"END:VEVENT"))
+    end = content.index(b"END:VEVENT", start) + len(b"END:VEVENT\r\n")
+    calendar_file.write_bytes(content[:start] + content[end:])
+
+    assert len(cache.load(calendar_file)) == 1
+    assert cache.parses == 2
+
+
+def test_snapshot_skips_parsing_on_warm_start(calendar_file, tmp_path):
+    snapshots = tmp_path / "snapshots"
+    CalendarCache(snapshots).load(calendar_file)
+
+    warm_cache = CalendarCache(snapshots)
+    events = warm_cache.load(calendar_file)
+
+    assert warm_cache.parses == 0
+    assert events == CalendarCache().load(calendar_file)
@@ -0,0 +1,169 @@
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from octoprint_print_planning_scheduler.printing_schedule.calendar_subscription import (
+    CalendarSubscription,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from test.conftest import wait_for
+
+
+def _calendar(*hours):
+    events = "".join(
+        "BEGIN:VEVENT\r\n"
+        f"DTSTART:20240101T{hour:02d}0000\r\n"
+        f"DTEND:20240101T{hour + 1:02d}0000\r\n"
+        "END:VEVENT\r\n"
+        for hour in hours
+    )
+    return f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n{events}END:VCALENDAR\r\n".encode()
+
+
+class _Feed:
+    """What the stand-in server serves, changed by the tests."""
+
+    def __init__(self):
+        self.body = _calendar(8)
+        self.etag = '"1"'
+        self.status = 200
+        self.requests = []
+
+
+@pytest.fixture
+def feed():
+    feed = _Feed()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            feed.requests.append(dict(self.headers))
+            if feed.status != 200:
+                self.send_error(feed.status)
+                return
+            if feed.etag is not None and self.headers["If-None-Match"] == feed.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            if feed.etag is not None:
+                self.send_header("ETag", feed.etag)
+            self.send_header("Content-Length", str(len(feed.body)))
+            self.end_headers()
+            self.wfile.write(feed.body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    feed.url = f"http://127.0.0.1:{server.server_address[1]}/outages.ics"
+    yield feed
+    server.shutdown()
+    server.server_close()
+
+
+def _hours(subscription):
+    calendar = subscription.calendar()
+    day = DateInterval(datetime(2024, 1, 1), datetime(2024, 1, 2))
+    return [i.start.hour for i in calendar.generate_intervals_for_period(day)]
+
+
+def test_conditional_requests_skip_unchanged_calendars(feed, tmp_path):
+    updates = []
+    subscription = CalendarSubscription(
+        feed.url, tmp_path / "calendar.ics", on_update=lambda: updates.append(1)
+    )
+
+    assert subscription.calendar() is None
+    assert subscription.refresh()
+    assert _hours(subscription) == [8]
+    assert not subscription.refresh()
+    assert feed.requests[-1]["If-None-Match"] == '"1"'
+    assert subscription.not_modified == 1
+
+    # a server without validators sends the same body again
+    feed.etag = None
+    assert not subscription.refresh()
+    assert subscription.unchanged == 1
+
+    feed.body = _calendar(8, 12)
+    assert subscription.refresh()
+    assert _hours(subscription) == [8, 12]
+    assert len(updates) == 2
+
+
+def test_calendar_is_kept_when_the_feed_breaks(feed, tmp_path):
+    subscription = CalendarSubscription(feed.url, tmp_path / "calendar.ics")
+    subscription.refresh()
+
+    feed.status = 500
+    with pytest.raises(Exception):
+        subscription.refresh()
+    feed.status, feed.etag, feed.body = 200, None, b"not a calendar"
+    with pytest.raises(Exception):
+        subscription.refresh()
+
+    assert _hours(subscription) == [8]
+    assert (tmp_path / "calendar.ics").read_bytes() == _calendar(8)
+
+
+def test_restart_uses_the_cached_calendar(feed, tmp_path):
+    CalendarSubscription(feed.url, tmp_path / "calendar.ics").refresh()
+
+    restarted = CalendarSubscription(feed.url, tmp_path / "calendar.ics")
+    assert restarted.load_cached()
+    assert _hours(restarted) == [8]
+    assert not restarted.refresh()
+    assert feed.requests[-1]["If-None-Match"] == '"1"'
+
+
+def test_failures_back_off():
+    subscription = CalendarSubscription(
+        "http://127.0.0.1:9/", "unused.ics", min_backoff=10, max_backoff=60
+    )
+    delays = []
+    for failures in range(6):
+        subscription.failures = failures
+        delays.append(subscription.next_delay())
+
+    assert delays == [900, 10, 20, 40, 60, 60]
+
+
+def test_background_refresh_swaps_the_calendar(feed, tmp_path):
+    subscription = CalendarSubscription(
+        feed.url, tmp_path / "calendar.ics", refresh_interval=0.01
+    )
+    subscription.start()
+    wait_for(lambda: subscription.calendar() is not None)
+    feed.body, feed.etag = _calendar(20), '"2"'
+    wait_for(lambda: _hours(subscription) == [20])
+    subscription.stop()
+
+    assert subscription.failures == 0
+
+
+def test_cache_of_another_url_is_ignored(feed, tmp_path):
+    CalendarSubscription(feed.url, tmp_path / "calendar.ics").refresh()
+
+    other = CalendarSubscription(feed.url + "?other", tmp_path / "calendar.ics")
+    assert not other.load_cached()
+    assert other.refresh()
+    assert "If-None-Match" not in feed.requests[-1]
+
+
+def test_stopped_subscription_drops_its_fetch(feed, tmp_path):
+    updates = []
+    subscription = CalendarSubscription(
+        feed.url, tmp_path / "calendar.ics", on_update=lambda: updates.append(1)
+    )
+    subscription.stop()
+
+    assert not subscription.refresh()
+    assert subscription.calendar() is None
+    assert not (tmp_path / "calendar.ics").exists()
+    assert not updates
@@ -1,8 +1,10 @@
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
     DateInterval,
+    from_key,
+    to_key,
 )
 from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
     DateIntervalSet,
@@ -133,3 +135,193 @@ def test_find_closest_future_interval():
     assert closest_interval == DateInterval(
         datetime(2023, 1, 15), datetime(2023, 1, 20)
     )
+
+
+def test_add_interval_merges_only_neighbours():
+    interval_set = DateIntervalSet()
+    interval_set.add(DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 3)))
+    interval_set.add(DateInterval(datetime(2023, 1, 5), datetime(2023, 1, 7)))
+    interval_set.add(DateInterval(datetime(2023, 1, 9), datetime(2023, 1, 11)))
+    interval_set.add(DateInterval(datetime(2023, 1, 20), datetime(2023, 1, 21)))
+    interval_set.add(DateInterval(datetime(2023, 1, 6), datetime(2023, 1, 10)))
+    assert interval_set.intervals == [
+        DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 3)),
+        DateInterval(datetime(2023, 1, 5), datetime(2023, 1, 11)),
+        DateInterval(datetime(2023, 1, 20), datetime(2023, 1, 21)),
+    ]
+
+
+def test_constructor_merges_unsorted_intervals():
+    interval_set = DateIntervalSet(
+        [
+            DateInterval(datetime(2023, 1, 15), datetime(2023, 1, 20)),
+            DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 10)),
+            DateInterval(datetime(2023, 1, 10), datetime(2023, 1, 12)),
+        ]
+    )
+    assert interval_set.intervals == [
+        DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 12)),
+        DateInterval(datetime(2023, 1, 15), datetime(2023, 1, 20)),
+    ]
+
+
+def test_extend_merges_sorted_sets():
+    first = DateIntervalSet(
+        [
+            DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 5)),
+            DateInterval(datetime(2023, 1, 10), datetime(2023, 1, 15)),
+        ]
+    )
+    second = DateIntervalSet(
+        [
+            DateInterval(datetime(2023, 1, 4), datetime(2023, 1, 6)),
+            DateInterval(datetime(2023, 1, 20), datetime(2023, 1, 25)),
+        ]
+    )
+    first.extend(second)
+    assert first.intervals == [
+        DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 6)),
+        DateInterval(datetime(2023, 1, 10), datetime(2023, 1, 15)),
+        DateInterval(datetime(2023, 1, 20), datetime(2023, 1, 25)),
+    ]
+    assert len(second) == 2
+
+
+def test_get_inverted_intervals_ignores_intervals_outside_range():
+    interval_set = DateIntervalSet(
+        [
+            DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 3)),
+            DateInterval(datetime(2023, 1, 5), datetime(2023, 1, 7)),
+            DateInterval(datetime(2023, 1, 20), datetime(2023, 1, 25)),
+        ]
+    )
+    assert interval_set.get_inverted_intervals(
+        datetime(2023, 1, 2), datetime(2023, 1, 10)
+    ) == [
+        DateInterval(datetime(2023, 1, 3), datetime(2023, 1, 5)),
+        DateInterval(datetime(2023, 1, 7), datetime(2023, 1, 10)),
+    ]
+
+
+def _day_set(*days):
+    return DateIntervalSet.from_unsorted(
+        DateInterval(datetime(2023, 1, start), datetime(2023, 1, end))
+        for start, end in days
+    )
+
+
+def test_from_unsorted_merges_overlaps():
+    assert _day_set((10, 12), (1, 5), (4, 6)).intervals == [
+        DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 6)),
+        DateInterval(datetime(2023, 1, 10), datetime(2023, 1, 12)),
+    ]
+
+
+def test_union():
+    result = _day_set((1, 5), (10, 15)).union(_day_set((5, 7), (20, 22)))
+    assert result == _day_set((1, 7), (10, 15), (20, 22))
+
+
+def test_intersection():
+    result = _day_set((1, 5), (10, 15), (20, 25)) & _day_set((3, 12), (14, 21))
+    assert result == _day_set((3, 5), (10, 12), (14, 15), (20, 21))
+
+
+def test_difference():
+    power = _day_set((1, 10), (12, 20), (22, 28))
+    maintenance = _day_set((2, 3), (5, 6), (18, 23))
+    outages = _day_set((8, 13))
+    assert power - maintenance - outages == _day_set(
+        (1, 2), (3, 5), (6, 8), (13, 18), (23, 28)
+    )
+
+
+def test_difference_matches_remove_interval():
+    available = _day_set((1, 4), (6, 9), (11, 20), (22, 30))
+    removed = _day_set((2, 3), (4, 6), (8, 12), (15, 16), (19, 25))
+    expected = available.copy()
+    for interval in removed:
+        expected.remove_interval(interval)
+    assert available.difference(removed) == expected
+
+
+def test_intervals_are_stored_as_epoch_keys(local_timezone):
+    local_timezone("UTC")
+    interval_set = _day_set((1, 5), (10, 12))
+    assert list(interval_set.iter_keys()) == [
+        (1672531200000000, 1672876800000000),
+        (1673308800000000, 1673481600000000),
+    ]
+    assert interval_set.intervals[1] == DateInterval(
+        datetime(2023, 1, 10), datetime(2023, 1, 12)
+    )
+
+
+def test_aware_intervals_keep_timezone():
+    tz = timezone(timedelta(hours=2))
+    interval = DateInterval(
+        datetime(2023, 1, 1, 10, tzinfo=tz), datetime(2023, 1, 1, 12, tzinfo=tz)
+    )
+    interval_set = DateIntervalSet([interval])
+    assert interval_set.intervals == [interval]
+    assert interval_set.intervals[0].start.tzinfo == tz
+
+
+def test_date_interval_has_no_instance_dict():
+    interval = DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 2))
+    with pytest.raises(AttributeError):
+        interval.extra = 1
+
+
+def test_point_queries():
+    interval_set = _day_set((1, 5), (10, 12))
+    assert interval_set.contains(datetime(2023, 1, 3))
+    assert interval_set.contains(datetime(2023, 1, 5))
+    assert not interval_set.contains(datetime(2023, 1, 7))
+    assert interval_set.interval_at(datetime(2023, 1, 11)) == DateInterval(
+        datetime(2023, 1, 10), datetime(2023, 1, 12)
+    )
+    assert interval_set.interval_at(datetime(2023, 1, 8)) is None
+    assert interval_set.covering(
+        datetime(2023, 1, 2), datetime(2023, 1, 4)
+    ) == DateInterval(datetime(2023, 1, 1), datetime(2023, 1, 5))
+    assert interval_set.covering(datetime(2023, 1, 4), datetime(2023, 1, 11)) is None
+
+
+def test_next_gap_after():
+    interval_set = _day_set((1, 5), (10, 12))
+    assert interval_set.next_gap_after(datetime(2023, 1, 3)) == DateInterval(
+        datetime(2023, 1, 5), datetime(2023, 1, 10)
+    )
+    assert interval_set.next_gap_after(datetime(2023, 1, 7)) == DateInterval(
+        datetime(2023, 1, 7), datetime(2023, 1, 10)
+    )
+    assert interval_set.next_gap_after(datetime(2023, 1, 11)) == DateInterval(
+        datetime(2023, 1, 12), None
+    )
+
+
+def test_naive_datetimes_are_local_time(local_timezone):
+    local_timezone("Europe/Berlin")
+    summer = datetime(2024, 7, 1, 12)
+    winter = datetime(2024, 1, 1, 12)
+
+    assert to_key(summer) == to_key(datetime(2024, 7, 1, 10, tzinfo=timezone.utc))
+    assert to_key(winter) == to_key(datetime(2024, 1, 1, 11, tzinfo=timezone.utc))
+    assert from_key(to_key(summer)) == summer
+
+
+def test_naive_and_aware_intervals_share_one_key_space(local_timezone):
+    local_timezone("Europe/Berlin")
+    naive = DateInterval(datetime(2024, 7, 1, 12), datetime(2024, 7, 1, 14))
+    aware = DateInterval(
+        datetime(2024, 7, 1, 11, tzinfo=timezone.utc),
+        datetime(2024, 7, 1, 13, tzinfo=timezone.utc),
+    )
+
+    merged = DateIntervalSet([naive, aware])
+
+    assert merged.intervals == [
+        DateInterval(datetime(2024, 7, 1, 12), datetime(2024, 7, 1, 15))
+    ]
+    assert merged.contains(datetime(2024, 7, 1, 12, 30, tzinfo=timezone.utc))
@@ -0,0 +1,51 @@
+import time
+from datetime import datetime, timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.deadline_dispatcher import (
+    DeadlineDispatcher,
+)
+from test.conftest import wait_for
+
+
+def _in(seconds):
+    return datetime.now() + timedelta(seconds=seconds)
+
+
+def test_callbacks_run_in_deadline_order():
+    calls = []
+    dispatcher = DeadlineDispatcher()
+    dispatcher.start()
+    dispatcher.schedule("late", _in(0.06), lambda: calls.append("late"))
+    dispatcher.schedule("early", _in(0.02), lambda: calls.append("early"))
+    wait_for(lambda: len(calls) == 2)
+    dispatcher.stop()
+
+    assert calls == ["early", "late"]
+    assert len(dispatcher) == 0
+
+
+def test_rescheduled_and_cancelled_keys_run_once_or_never():
+    calls = []
+    dispatcher = DeadlineDispatcher()
+    dispatcher.schedule("start", _in(0.01), lambda: calls.append("first"))
+    dispatcher.schedule("start", _in(0.03), lambda: calls.append("second"))
+    dispatcher.schedule("pause", _in(0.02), lambda: calls.append("pause"))
+    dispatcher.cancel("pause")
+    assert dispatcher.next_deadline() is not None
+    dispatcher.start()
+    wait_for(lambda: calls)
+    time.sleep(0.05)
+    dispatcher.stop()
+
+    assert calls == ["second"]
+    assert dispatcher.next_deadline() is None
+
+
+def test_idle_dispatcher_does_not_wake_up():
+    dispatcher = DeadlineDispatcher()
+    dispatcher.start()
+    dispatcher.schedule("far", _in(3600), lambda: None)
+    time.sleep(0.1)
+    dispatcher.stop()
+
+    assert dispatcher.wakeups <= 1
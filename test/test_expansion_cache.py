@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.expansion_cache import (
+    ExpansionCache,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+    RecurringEvent,
+    SingleEvent,
+    rrulestr,
+)
+
+
+def _calendar(cache=None):
+    start = datetime(2024, 7, 1, 10, 0)
+    return InfiniteCalendar(
+        [
+            RecurringEvent(
+                start,
+                start + timedelta(hours=1),
+                rrulestr("FREQ=HOURLY;INTERVAL=5", dtstart=start),
+            ),
+            RecurringEvent(
+                start,
+                start + timedelta(hours=2),
+                rrulestr("FREQ=DAILY", dtstart=start),
+            ),
+            SingleEvent(datetime(2024, 7, 2, 15, 0), datetime(2024, 7, 2, 18, 0)),
+        ],
+        cache,
+    )
+
+
+def _uncached(calendar, period):
+    result = DateIntervalSet()
+    for event in calendar.events:
+        result.extend(event.generate_intervals(period))
+    return result
+
+
+def test_cached_expansion_matches_direct_expansion():
+    calendar = _calendar()
+    period = DateInterval(datetime(2024, 7, 1), datetime(2024, 7, 4))
+    assert calendar.generate_intervals_for_period(period) == _uncached(calendar, period)
+
+
+def test_repeated_window_is_a_hit():
+    calendar = _calendar()
+    period = DateInterval(datetime(2024, 7, 1), datetime(2024, 7, 3))
+    first = calendar.generate_intervals_for_period(period)
+    first.remove_interval(period)
+    second = calendar.generate_intervals_for_period(period)
+
+    assert calendar.expansion_cache.hits == 1
+    assert calendar.expansion_cache.misses == 1
+    assert second == _uncached(calendar, period)
+
+
+def test_sliding_window_expands_only_new_occurrences():
+    calendar = _calendar()
+    calendar.generate_intervals_for_period(
+        DateInterval(datetime(2024, 7, 1), datetime(2024, 7, 3))
+    )
+    expanded = calendar.expansion_cache.expanded_occurrences
+
+    period = DateInterval(datetime(2024, 7, 2), datetime(2024, 7, 4))
+    assert calendar.generate_intervals_for_period(period) == _uncached(calendar, period)
+    # one day of five-hourly and daily occurrences
+    assert calendar.expansion_cache.expanded_occurrences - expanded <= 6
+
+
+def test_windows_are_evicted_least_recently_used_first():
+    calendar = _calendar(ExpansionCache(max_windows=2))
+    days = [
+        DateInterval(datetime(2024, 7, day), datetime(2024, 7, day + 1))
+        for day in (1, 2, 3)
+    ]
+    for day in days:
+        calendar.generate_intervals_for_period(day)
+    calendar.generate_intervals_for_period(days[2])
+    calendar.generate_intervals_for_period(days[0])
+
+    assert calendar.expansion_cache.hits == 1
+    assert calendar.expansion_cache.stats()["windows"] == 2
+
+
+def test_invalidate_drops_cached_windows():
+    calendar = _calendar()
+    period = DateInterval(datetime(2024, 7, 1), datetime(2024, 7, 2))
+    calendar.generate_intervals_for_period(period)
+    calendar.events.pop()
+    calendar.invalidate()
+
+    assert calendar.generate_intervals_for_period(period) == _uncached(calendar, period)
+    assert calendar.expansion_cache.misses == 2
+
+
+def test_added_event_patches_cached_windows():
+    calendar = _calendar()
+    periods = [
+        DateInterval(datetime(2024, 7, 1), datetime(2024, 7, 3)),
+        DateInterval(datetime(2024, 7, 2), datetime(2024, 7, 4)),
+    ]
+    for period in periods:
+        calendar.generate_intervals_for_period(period)
+    expanded = calendar.expansion_cache.expanded_occurrences
+
+    calendar.add_event(
+        SingleEvent(datetime(2024, 7, 2, 20, 0), datetime(2024, 7, 3, 2, 0))
+    )
+    for period in periods:
+        assert calendar.generate_intervals_for_period(period) == _uncached(
+            calendar, period
+        )
+    assert calendar.expansion_cache.hits == 2
+    assert calendar.expansion_cache.expanded_occurrences == expanded
+
+
+def test_removed_event_patches_cached_windows():
+    calendar = _calendar()
+    periods = [
+        DateInterval(datetime(2024, 7, 1), datetime(2024, 7, 3)),
+        DateInterval(datetime(2024, 7, 2), datetime(2024, 7, 4)),
+    ]
+    for period in periods:
+        calendar.generate_intervals_for_period(period)
+
+    calendar.remove_event(calendar.events[1])
+    for period in periods:
+        assert calendar.generate_intervals_for_period(period) == _uncached(
+            calendar, period
+        )
+    assert calendar.expansion_cache.hits == 2
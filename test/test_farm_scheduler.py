@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.farm_scheduler import (
+    FarmScheduler,
+    plan_groups,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+from test.conftest import DAY, at, free_time
+
+
+def _jobs(*hours):
+    return [PrintJob(f"job {i}", timedelta(hours=h)) for i, h in enumerate(hours)]
+
+
+def test_jobs_are_spread_over_printers():
+    scheduler = FarmScheduler(["mk3", "mini"], free_time((0, 10)))
+    plan = scheduler.plan(_jobs(3, 2, 1), DAY)
+
+    assert [(p.printer, p.interval) for p in plan.placements] == [
+        ("mk3", DateInterval(at(0), at(3))),
+        ("mini", DateInterval(at(0), at(2))),
+        ("mini", DateInterval(at(2), at(3))),
+    ]
+
+
+def test_jobs_wait_for_a_window_they_fit_in():
+    scheduler = FarmScheduler(["mk3"], free_time((0, 2), (3, 4), (6, 12)))
+    plan = scheduler.plan(_jobs(1, 3, 8), DAY)
+
+    assert [p.interval for p in plan.placements] == [
+        DateInterval(at(0), at(1)),
+        DateInterval(at(6), at(9)),
+    ]
+    assert [j.name for j in plan.unscheduled] == ["job 2"]
+
+
+def test_groups_planned_in_processes_match_sequential_planning():
+    availability = free_time((0, 5), (6, 20), (22, 40))
+    groups = {
+        "left": (["a", "b"], _jobs(2, 4, 1, 6, 3)),
+        "right": (["c"], _jobs(5, 5, 2)),
+    }
+    parallel = plan_groups(groups, availability, DAY, max_workers=2)
+    sequential = plan_groups(groups, availability, DAY, max_workers=1)
+
+    assert parallel == sequential
+    assert set(parallel["left"].by_printer()) == {"a", "b"}
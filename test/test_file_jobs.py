@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.file_jobs import (
+    EstimateStore,
+    job_from_file,
+)
+
+
+class _FileManager:
+    def __init__(self, folder, metadata):
+        self.folder = folder
+        self.metadata = metadata
+
+    def get_metadata(self, storage, path):
+        return self.metadata.get(path)
+
+    def path_on_disk(self, storage, path):
+        return str(self.folder / path)
+
+
+def test_analysis_estimate_is_used_when_present(tmp_path):
+    files = _FileManager(
+        tmp_path, {"a.gcode": {"analysis": {"estimatedPrintTime": 90.0}}}
+    )
+    store = EstimateStore()
+
+    job = job_from_file(files, "a.gcode", store, priority=3)
+
+    assert job.duration == timedelta(seconds=90)
+    assert job.path == "a.gcode" and job.name == "a.gcode" and job.priority == 3
+    assert store.estimates == 0
+
+
+def test_files_without_analysis_are_estimated_once_per_hash(tmp_path):
+    (tmp_path / "a.gcode").write_bytes(b"G1 X60 F3600\n")
+    (tmp_path / "copy.gcode").write_bytes(b"G1 X60 F3600\n")
+    files = _FileManager(tmp_path, {})
+    store = EstimateStore(tmp_path / "estimates.json")
+
+    first = job_from_file(files, "a.gcode", store)
+    second = job_from_file(files, "copy.gcode", store)
+    restored = EstimateStore(tmp_path / "estimates.json")
+    third = job_from_file(files, "a.gcode", restored)
+
+    assert first.duration == second.duration == third.duration
+    assert first.duration == timedelta(seconds=1)
+    assert store.estimates == 1
+    assert restored.estimates == 0
+
+
+def test_octoprint_hash_is_used_as_key(tmp_path):
+    (tmp_path / "a.gcode").write_bytes(b"G1 X60 F3600\n")
+    files = _FileManager(tmp_path, {"a.gcode": {"hash": "known"}})
+    store = EstimateStore()
+    store.put("known", timedelta(minutes=5))
+
+    assert job_from_file(files, "a.gcode", store).duration == timedelta(minutes=5)
+    assert store.estimates == 0
+
+
+def test_unchanged_files_are_not_hashed_again(tmp_path):
+    path = tmp_path / "a.gcode"
+    path.write_bytes(b"G1 X60 F3600\n")
+    files = _FileManager(tmp_path, {})
+    store = EstimateStore(tmp_path / "estimates.json")
+
+    job_from_file(files, "a.gcode", store)
+    job_from_file(files, "a.gcode", store)
+    restored = EstimateStore(tmp_path / "estimates.json")
+    job_from_file(files, "a.gcode", restored)
+
+    assert store.hashes == 1
+    assert restored.hashes == 0
+
+    path.write_bytes(b"G1 X120 F3600\n")
+    assert job_from_file(files, "a.gcode", restored).duration == timedelta(seconds=2)
+    assert restored.hashes == 1
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from pytest import approx
+
+from octoprint_print_planning_scheduler.printing_schedule.gcode_estimator import (
+    GcodeTimeEstimator,
+    _mapped_lines,
+)
+
+GCODE = b"""; test part
+G21
+G90
+M83
+G1 F6000 ; one hundred mm per second
+G1 X100 Y0
+G1 X100 Y100 E5
+G4 P500
+G91
+G1 Z10 F600
+G1 E-2 F1200
+G20
+G90
+G1 X0 F60
+"""
+
+
+def test_estimate_sums_moves_and_dwells(tmp_path):
+    gcode = tmp_path / "part.gcode"
+    gcode.write_bytes(GCODE)
+
+    estimate = GcodeTimeEstimator().estimate(gcode)
+
+    # 1s + 1s + 0.5s dwell + 1s z move + 0.1s retract + 100mm at 1524 mm/min
+    expected = 1 + 1 + 0.5 + 1 + 0.1 + 100 / (60 * 25.4) * 60
+    assert estimate.total_seconds() == approx(expected)
+
+
+def test_speed_factor_scales_estimate(tmp_path):
+    gcode = tmp_path / "part.gcode"
+    gcode.write_bytes(b"G1 X60 F3600\n")
+
+    assert GcodeTimeEstimator(speed_factor=1.5).estimate(gcode) == timedelta(
+        seconds=1.5
+    )
+
+
+def test_lines_are_split_across_chunks(tmp_path):
+    gcode = tmp_path / "part.gcode"
+    gcode.write_bytes(b"G1 X1\nG1 X22\nG1 X333")
+
+    assert list(_mapped_lines(gcode, chunk_size=4)) == [
+        b"G1 X1",
+        b"G1 X22",
+        b"G1 X333",
+    ]
+
+
+def test_empty_file_takes_no_time(tmp_path):
+    gcode = tmp_path / "empty.gcode"
+    gcode.write_bytes(b"")
+
+    assert GcodeTimeEstimator().estimate(gcode) == timedelta()
@@ -0,0 +1,120 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+    to_utc,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+)
+
+FEED = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VEVENT\r\n"
+    "SUMMARY:Old outage\r\n"
+    "DTSTART:20200101T100000\r\n"
+    "DTEND:20200101T120000\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20240701T100000\r\n"
+    "DTEND:20240701T110000\r\n"
+    "RRULE:FREQ=WEEKLY;BY\r\n"
+    " DAY=MO,TH\r\n"
+    "BEGIN:VALARM\r\n"
+    "TRIGGER:-PT15M\r\n"
+    "DTSTART:19990101T000000\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20200101T100000\r\n"
+    "DTEND:20200101T110000\r\n"
+    "RRULE:FREQ=DAILY;COUNT=5\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20240702T150000\r\n"
+    "DTEND:20240702T153000\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def _expand(calendar, period):
+    return [event.generate_intervals(period).intervals for event in calendar.events]
+
+
+def test_stream_parser_matches_full_parser(tmp_path):
+    path = tmp_path / "feed.ics"
+    path.write_text(FEED, newline="")
+    streamed = InfiniteCalendar.from_stream(path)
+    parsed = InfiniteCalendar.from_file(path)
+
+    assert [(e.start, e.end) for e in streamed.events] == [
+        (e.start, e.end) for e in parsed.events
+    ]
+    period = DateInterval(datetime(2019, 12, 1), datetime(2024, 7, 10))
+    assert _expand(streamed, period) == _expand(parsed, period)
+
+
+def test_stream_parser_reads_timezones_and_folded_rules(tmp_path):
+    path = tmp_path / "feed.ics"
+    path.write_text(
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VEVENT\r\n"
+        'DTSTART;TZID="Europe/Kyiv":20240701T100000\r\n'
+        "DTEND;TZID=Europe/Kyiv:20240701T110000\r\n"
+        "RRULE:FREQ=WEEKLY;BY\r\n"
+        " DAY=MO,TH\r\n"
+        "END:VEVENT\r\n"
+        "END:VCALENDAR\r\n",
+        newline="",
+    )
+    tz = ZoneInfo("Europe/Kyiv")
+    weekly = InfiniteCalendar.from_stream(path).events[0]
+
+    assert weekly.start == datetime(2024, 7, 1, 10, 0, tzinfo=tz)
+    assert weekly.recurrence.between(
+        datetime(2024, 7, 1, tzinfo=tz), datetime(2024, 7, 8, tzinfo=tz)
+    ) == [
+        datetime(2024, 7, 1, 10, 0, tzinfo=tz),
+        datetime(2024, 7, 4, 10, 0, tzinfo=tz),
+    ]
+
+
+def test_stream_parser_skips_events_that_ended_before_cutoff(tmp_path):
+    path = tmp_path / "feed.ics"
+    path.write_text(FEED, newline="")
+    calendar = InfiniteCalendar.from_stream(path, ended_before=datetime(2023, 1, 1))
+
+    # events are kept in UTC, the feed's floating times are local time
+    assert [e.start for e in calendar.events] == [
+        to_utc(datetime(2024, 7, 1, 10, 0)),
+        to_utc(datetime(2024, 7, 2, 15, 0)),
+    ]
+
+
+def test_finite_rules_are_known_from_parsing(tmp_path):
+    path = tmp_path / "feed.ics"
+    path.write_text(
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART:20200106T100000\r\n"
+        "DTEND:20200106T110000\r\n"
+        "RRULE:FREQ=WEEKLY;BYDAY=MO,TH;UNTIL=20200301T000000\r\n"
+        "END:VEVENT\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART:20200106T100000\r\n"
+        "DTEND:20200106T110000\r\n"
+        "RRULE:FREQ=WEEKLY;BYDAY=MO,TH\r\n"
+        "END:VEVENT\r\n"
+        "END:VCALENDAR\r\n",
+        newline="",
+    )
+
+    assert [e.finite for e in InfiniteCalendar.from_file(path).events] == [
+        True,
+        False,
+    ]
+    calendar = InfiniteCalendar.from_stream(path, ended_before=datetime(2023, 1, 1))
+    assert [e.finite for e in calendar.events] == [False]
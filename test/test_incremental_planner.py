@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.incremental_planner import (
+    IncrementalPlanner,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    PlacementEngine,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_schedule import (
+    PrintSchedule,
+)
+from test.conftest import at, free_time, make_job, span
+
+
+def test_initial_plan_matches_first_fit():
+    jobs = [make_job("a", 2), make_job("b", 3), make_job("c", 1), make_job("d", 5)]
+    free = free_time((0, 4), (5, 9))
+
+    planner = IncrementalPlanner(free, jobs)
+    expected = PlacementEngine("first_fit").place(jobs, free)
+
+    assert planner.result().placements == expected.placements
+    assert planner.result().unscheduled == expected.unscheduled
+    assert planner.free == expected.remaining
+
+
+def test_cancel_gives_time_to_unscheduled_jobs():
+    planner = IncrementalPlanner(free_time((0, 4)))
+    first = planner.add_job(make_job("a", 3))
+    planner.add_job(make_job("b", 2))
+    assert [j.name for j in planner.unscheduled.values()] == ["b"]
+
+    planner.cancel_job(first)
+
+    assert not planner.unscheduled
+    assert [p.interval for p in planner.placements.values()] == [span(0, 2)]
+
+
+def test_job_finished_early_releases_rest_of_slot():
+    planner = IncrementalPlanner(free_time((0, 4)))
+    first = planner.add_job(make_job("a", 3))
+    second = planner.add_job(make_job("b", 2))
+
+    planner.job_finished(first, at(1))
+
+    assert first not in planner.placements
+    assert planner.placements[second].interval == span(1, 3)
+    assert planner.free == free_time((3, 4))
+
+
+def test_outage_only_moves_overlapping_jobs():
+    planner = IncrementalPlanner(free_time((0, 10)))
+    ids = [planner.add_job(make_job(name, 2)) for name in "abc"]
+    before = dict(planner.placements)
+
+    planner.add_outage(at(2.5), at(3))
+
+    assert planner.placements[ids[0]] == before[ids[0]]
+    assert planner.placements[ids[2]] == before[ids[2]]
+    assert planner.placements[ids[1]].interval == span(6, 8)
+    assert planner.free == free_time((2, 2.5), (3, 4), (8, 10))
+    assert planner.available_time == timedelta(hours=9.5)
+
+
+def test_time_before_now_is_not_given_back():
+    planner = IncrementalPlanner(free_time((0, 2), (3, 10)), now=at(1))
+    running = planner.add_job(make_job("a", 4))
+    moved = planner.add_job(make_job("b", 3))
+    waiting = planner.add_job(make_job("c", 2))
+    assert planner.placements[running].interval == span(3, 7)
+    assert planner.free == free_time((1, 2))
+
+    planner.cancel_job(running, now=at(5))
+
+    # later jobs move up into the released time, but not before now
+    assert planner.placements[moved].interval == span(5, 8)
+    assert planner.placements[waiting].interval == span(8, 10)
+    assert planner.free == free_time()
+    planner.add_outage(at(4), at(6), now=at(5))
+    assert moved in planner.unscheduled
+    assert planner.free == free_time((6, 8))
+    assert planner.available_time == timedelta(hours=8)
+
+
+def test_started_job_is_pinned_to_its_start():
+    planner = IncrementalPlanner(free_time((0, 10)))
+    first = planner.add_job(make_job("a", 2))
+    second = planner.add_job(make_job("b", 3))
+
+    planner.job_started(second, at(1), now=at(1))
+
+    assert planner.placements[second].interval == span(1, 4)
+    assert planner.placements[first].interval == span(4, 6)
+    assert planner.free == free_time((6, 10))
+
+    planner.job_finished(second, at(2), now=at(2))
+
+    assert planner.placements[first].interval == span(2, 4)
+
+
+def test_job_overrun_pushes_following_job():
+    planner = IncrementalPlanner(free_time((0, 6)))
+    first = planner.add_job(make_job("a", 2))
+    second = planner.add_job(make_job("b", 2))
+
+    planner.job_finished(first, at(3))
+
+    assert planner.placements[second].interval == span(3, 5)
+
+
+def test_schedule_jobs_can_be_run_again(data_folder):
+    scheduler = PrintSchedule(data_folder / "minimal_calendar.ics")
+    scheduler.add_job(timedelta(hours=1))
+    scheduler.add_job(timedelta(hours=2))
+
+    assert scheduler.schedule_jobs() == scheduler.schedule_jobs()
+    planner = scheduler.incremental_planner()
+    assert len(planner.placements) + len(planner.unscheduled) == 2
@@ -0,0 +1,113 @@
+import pstats
+from datetime import datetime, timedelta
+
+import pytest
+
+from octoprint_print_planning_scheduler.printing_schedule import instrumentation
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+)
+from octoprint_print_planning_scheduler.printing_schedule.instrumentation import (
+    Histogram,
+    Metrics,
+    metrics,
+    profile_call,
+)
+
+
+@pytest.fixture
+def clean_metrics():
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+
+def test_histogram_buckets_durations():
+    histogram = Histogram()
+    histogram.record(0.000_003)
+    histogram.record(0.003)
+    histogram.record(0.004)
+    histogram.record(1000)
+
+    data = histogram.to_dict()
+    assert data["count"] == 4
+    assert data["max"] == 1000
+    assert data["buckets"] == [
+        {"le": 0.00001, "count": 1},
+        {"le": 0.005, "count": 2},
+        {"le": None, "count": 1},
+    ]
+
+
+def test_timed_records_calls_and_exceptions():
+    recorder = Metrics()
+
+    @recorder.timed("stage")
+    def stage(fail=False):
+        if fail:
+            raise ValueError()
+        return 1
+
+    assert stage() == 1
+    with pytest.raises(ValueError):
+        stage(fail=True)
+
+    assert recorder.snapshot()["timings"]["stage"]["count"] == 2
+
+
+def test_disabled_metrics_record_nothing():
+    recorder = Metrics()
+    recorder.enabled = False
+    recorder.timed("stage")(lambda: None)()
+    with recorder.measure("block"):
+        pass
+    recorder.count("things")
+    recorder.record("direct", 1.0)
+
+    assert recorder.snapshot() == {"timings": {}, "counters": {}}
+
+
+def test_interval_set_operations_are_counted(clean_metrics):
+    day = datetime(2024, 1, 1)
+    interval_set = DateIntervalSet(
+        [
+            DateInterval(day, day + timedelta(hours=2)),
+            DateInterval(day + timedelta(hours=1), day + timedelta(hours=3)),
+        ]
+    )
+    interval_set.add(DateInterval(day + timedelta(hours=3), day + timedelta(hours=4)))
+    interval_set.union(interval_set)
+
+    snapshot = clean_metrics.snapshot()
+    # one merge while building, one in add and one per interval of the union
+    assert snapshot["counters"]["intervals_merged"] == 3
+    assert snapshot["timings"]["interval_set.union"]["count"] == 1
+
+
+def test_calendar_stages_are_timed(clean_metrics, data_folder):
+    calendar = InfiniteCalendar.from_file(data_folder / "minimal_calendar.ics")
+    period = DateInterval(datetime(2024, 1, 1), datetime(2024, 1, 8))
+    calendar.generate_intervals_for_period(period)
+    calendar.generate_intervals_for_period(period)
+
+    snapshot = clean_metrics.snapshot()
+    assert snapshot["timings"]["calendar.from_file"]["count"] == 1
+    assert snapshot["timings"]["calendar.generate_intervals_for_period"]["count"] == 2
+    assert snapshot["counters"]["expansion_cache_hits"] == 1
+    assert snapshot["counters"]["expansion_cache_misses"] == 1
+
+
+def test_profile_call_writes_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "pyinstrument", None)
+
+    result, path = profile_call(lambda: sum(range(1000)), tmp_path / "profiles")
+
+    assert result == sum(range(1000))
+    assert path.parent == tmp_path / "profiles"
+    assert pstats.Stats(str(path)).total_calls > 0
@@ -0,0 +1,120 @@
+import time
+
+from octoprint_print_planning_scheduler.printing_schedule.message_batcher import (
+    MessageBatcher,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_api import (
+    merge_plan_messages,
+)
+from test.conftest import wait_for
+
+
+def test_messages_of_one_kind_are_coalesced():
+    sent = []
+    batcher = MessageBatcher(sent.append, min_interval=0.05)
+    for version in range(1, 6):
+        batcher.push("plan", {"version": version})
+    batcher.push("outage", {"outage": None})
+    wait_for(lambda: sent)
+
+    assert sent == [
+        {
+            "messages": [
+                {"type": "plan", "version": 5},
+                {"type": "outage", "outage": None},
+            ]
+        }
+    ]
+
+
+def test_batches_are_rate_limited():
+    sent = []
+    batcher = MessageBatcher(lambda data: sent.append(time.monotonic()), 0.1)
+    batcher.push("plan", {})
+    wait_for(lambda: len(sent) == 1)
+    batcher.push("plan", {})
+    wait_for(lambda: len(sent) == 2)
+
+    assert sent[1] - sent[0] >= 0.09
+    assert batcher.sent_batches == 2
+
+
+def test_cancel_drops_pending_messages():
+    sent = []
+    batcher = MessageBatcher(sent.append, min_interval=10)
+    batcher.push("plan", {"version": 1})
+    wait_for(lambda: sent)
+    batcher.push("plan", {"version": 2})
+    batcher.cancel()
+    time.sleep(0.05)
+
+    assert len(sent) == 1
+
+
+def _placement(job, start):
+    return {"job": job, "priority": 1, "start": start, "end": start + "+1h"}
+
+
+def test_plan_deltas_in_one_batch_are_merged():
+    sent = []
+    batcher = MessageBatcher(
+        sent.append, min_interval=10, merge={"plan": merge_plan_messages}
+    )
+    batcher.push("plan", {"version": "e-1", "placements": [], "unscheduled": []})
+    wait_for(lambda: sent)
+    a, b, c = _placement("a", "08"), _placement("b", "09"), _placement("c", "10")
+    moved = _placement("a", "11")
+    batcher.push(
+        "plan",
+        {
+            "version": "e-2",
+            "since": "e-1",
+            "added": [a, b],
+            "removed": [],
+            "unscheduled": ["c"],
+        },
+    )
+    batcher.push(
+        "plan",
+        {
+            "version": "e-3",
+            "since": "e-2",
+            "added": [moved, c],
+            "removed": [a],
+            "unscheduled": [],
+            "windows": [],
+        },
+    )
+    batcher.flush()
+
+    assert sent[1] == {
+        "messages": [
+            {
+                "type": "plan",
+                "version": "e-3",
+                "since": "e-1",
+                "added": [b, moved, c],
+                "removed": [],
+                "unscheduled": [],
+                "windows": [],
+            }
+        ]
+    }
+
+
+def test_plan_delta_is_applied_to_a_pending_full_plan():
+    a, b = _placement("a", "08"), _placement("b", "09")
+    full = {"version": "e-1", "placements": [a], "unscheduled": [], "metrics": {}}
+    delta = {
+        "version": "e-2",
+        "since": "e-1",
+        "added": [b],
+        "removed": [a],
+        "unscheduled": ["a"],
+    }
+
+    merged = merge_plan_messages(full, delta)
+
+    assert merged == {"version": "e-2", "placements": [b], "unscheduled": ["a"]}
+    # a delta that does not follow the pending message replaces it
+    assert merge_plan_messages(full, {**delta, "since": "e-0"})["since"] == "e-0"
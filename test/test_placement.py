@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    FreeGapIndex,
+    PlacementEngine,
+    duration_key,
+)
+from test.conftest import DAY, free_time, make_job
+
+
+def test_first_fit_takes_earliest_window():
+    result = PlacementEngine("first_fit").place(
+        [make_job("a", 1)], free_time((0, 4), (6, 7))
+    )
+    assert result.placements[0].interval == DateInterval(DAY, DAY + timedelta(hours=1))
+
+
+def test_best_fit_keeps_large_windows_free():
+    jobs = [make_job("small", 1), make_job("large", 4)]
+    free = free_time((0, 4), (6, 7))
+
+    first_fit = PlacementEngine("first_fit").place(jobs, free)
+    best_fit = PlacementEngine("best_fit").place(jobs, free)
+
+    assert [j.name for j in first_fit.unscheduled] == ["large"]
+    assert best_fit.unscheduled == []
+    assert best_fit.placements[0].interval.start == DAY + timedelta(hours=6)
+
+
+def test_longest_job_first_places_long_jobs_before_short_ones():
+    jobs = [make_job("a", 2), make_job("b", 2), make_job("c", 3)]
+    free = free_time((0, 3), (4, 8))
+
+    assert len(PlacementEngine("best_fit").place(jobs, free).unscheduled) == 1
+    result = PlacementEngine("longest_job_first").place(jobs, free)
+    assert result.unscheduled == []
+    # placements are reported in queue order
+    assert [p.job.name for p in result.placements] == ["a", "b", "c"]
+
+
+def test_placement_metrics():
+    result = PlacementEngine().place(
+        [make_job("a", 1), make_job("b", 5)], free_time((0, 2), (3, 5))
+    )
+    assert result.utilization == 0.25
+    assert result.remaining == free_time((1, 2), (3, 5))
+    assert result.metrics()["unscheduled_jobs"] == 1
+    assert result.metrics()["largest_free_gap_seconds"] == 7200
+
+
+def test_gap_index_first_fit_respects_lower_bound():
+    index = FreeGapIndex(free_time((0, 4), (5, 6), (7, 12), (13, 20)))
+    assert index.first_fit(duration_key(timedelta(hours=3))) == 0
+    assert index.first_fit(duration_key(timedelta(hours=3)), not_before=1) == 2
+    assert index.first_fit(duration_key(timedelta(hours=6)), not_before=1) == 3
+    assert index.first_fit(duration_key(timedelta(hours=8))) == -1
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    PlacementEngine,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_api import (
+    EPOCH,
+    PlanHistory,
+    ScheduleSnapshot,
+    availability,
+    etag,
+    next_outage,
+    parse_version,
+    plan_delta,
+    plan_to_dict,
+)
+from octoprint_print_planning_scheduler.printing_schedule.planning_worker import (
+    PublishedPlan,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+from test.conftest import DAY, at, free_time
+
+
+def _published(version, jobs, power):
+    result = PlacementEngine().place(jobs, power)
+    return PublishedPlan(version, DAY, ScheduleSnapshot(result, power, at(24)))
+
+
+def test_history_keeps_latest_versions():
+    history = PlanHistory(max_versions=2)
+    for version in range(1, 4):
+        history.publish(_published(version, [], free_time((0, 1))))
+
+    assert history.get(1) is None
+    assert history.get(2).version == 2
+    assert history.latest.version == 3
+    assert etag(history.latest) == f"plan-{EPOCH}-3"
+
+
+def test_delta_lists_only_changed_placements():
+    jobs = [PrintJob("a", timedelta(hours=1)), PrintJob("b", timedelta(hours=1))]
+    old = _published(1, jobs, free_time((0, 4)))
+    new = _published(2, jobs, free_time((0, 1), (2, 4)))
+
+    delta = plan_delta(old, new)
+
+    assert delta["since"] == f"{EPOCH}-1" and delta["version"] == f"{EPOCH}-2"
+    assert [p["job"] for p in delta["added"]] == ["b"]
+    assert [p["job"] for p in delta["removed"]] == ["b"]
+    assert delta["added"][0]["start"] == at(2).isoformat()
+    assert len(plan_to_dict(new)["placements"]) == 2
+    assert [w["end"] for w in delta["windows"]] == [
+        at(1).isoformat(),
+        at(4).isoformat(),
+    ]
+    assert "windows" not in plan_delta(
+        new, _published(3, jobs, new.plan.power_intervals)
+    )
+
+
+def test_versions_of_another_boot_are_not_accepted():
+    assert parse_version(f"{EPOCH}-12") == 12
+    assert parse_version("other-boot-12") is None
+    assert parse_version("12") is None
+    assert parse_version(None) is None
+
+
+def test_availability_is_clipped_to_requested_range():
+    snapshot = _published(1, [], free_time((0, 4), (6, 10))).plan
+
+    assert len(availability(snapshot)) == 2
+    assert availability(snapshot, at(3), at(7)) == [
+        {"start": at(3).isoformat(), "end": at(4).isoformat()},
+        {"start": at(6).isoformat(), "end": at(7).isoformat()},
+    ]
+
+
+def test_next_outage_stays_inside_horizon():
+    snapshot = _published(1, [], free_time((0, 4), (6, 24))).plan
+
+    assert next_outage(snapshot, at(1)) == {
+        "start": at(4).isoformat(),
+        "end": at(6).isoformat(),
+    }
+    assert next_outage(snapshot, at(7)) is None
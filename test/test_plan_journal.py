@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    PlacementEngine,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_api import (
+    ScheduleSnapshot,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_journal import (
+    PlanJournal,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_dispatcher import (
+    PrintDispatcher,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+DAY = datetime(2024, 1, 1)
+
+
+def _snapshot(jobs, horizon=timedelta(hours=10)):
+    free = DateIntervalSet([DateInterval(DAY, DAY + horizon)])
+    return ScheduleSnapshot(PlacementEngine().place(jobs, free), free, DAY + horizon)
+
+
+def test_state_is_restored_after_reopening(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PlanJournal(path, sync=False)
+    first = PrintJob("first", timedelta(hours=2), deadline=DAY, path="a.gcode")
+    second = PrintJob("second", timedelta(hours=3), priority=2)
+    removed = PrintJob("removed", timedelta(hours=1))
+    for job in (first, removed, second):
+        journal.job_added(job)
+    journal.job_removed(removed)
+    outage = DateInterval(DAY + timedelta(hours=1), DAY + timedelta(hours=2))
+    journal.outage_added(outage)
+    journal.plan_published(_snapshot([first, second]))
+    journal.close()
+
+    restored = PlanJournal(path, sync=False)
+
+    assert restored.jobs == [first, second]
+    assert restored.outages == [outage]
+    power = _snapshot([]).power_intervals
+    snapshot = restored.snapshot(power, DAY + timedelta(hours=10))
+    assert [p.job for p in snapshot.result.placements] == [first, second]
+    # placements refer to the restored queue, not to copies of the jobs
+    assert snapshot.result.placements[0].job is restored.jobs[0]
+    assert snapshot.power_intervals == power
+    assert snapshot.horizon_end == DAY + timedelta(hours=10)
+
+
+def test_unchanged_plan_is_not_appended_again(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PlanJournal(path, sync=False)
+    job = PrintJob("job", timedelta(hours=1))
+    journal.job_added(job)
+    journal.plan_published(_snapshot([job]))
+    size = path.stat().st_size
+
+    journal.plan_published(_snapshot([job]))
+    # a horizon step moves the power windows but not the plan
+    journal.plan_published(_snapshot([job], timedelta(hours=10, minutes=1)))
+
+    assert path.stat().st_size == size
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PlanJournal(path, sync=False)
+    journal.job_added(PrintJob("kept", timedelta(hours=1)))
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"op": "job", "id": 2, "job": {"na')
+
+    restored = PlanJournal(path, sync=False)
+    restored.job_added(PrintJob("next", timedelta(hours=1)))
+    restored.close()
+
+    assert [job.name for job in PlanJournal(path).jobs] == ["kept", "next"]
+
+
+def test_compaction_keeps_state_and_drops_past_outages(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PlanJournal(path, compact_after=10, sync=False)
+    job = PrintJob("job", timedelta(hours=1))
+    journal.job_added(job)
+    # compaction also runs by itself, it compares the outages to the clock
+    now = datetime.now()
+    journal.outage_added(DateInterval(now - timedelta(days=2), now - timedelta(days=1)))
+    future = DateInterval(now + timedelta(hours=1), now + timedelta(hours=2))
+    journal.outage_added(future)
+    for index in range(20):
+        other = PrintJob(f"other {index}", timedelta(hours=1))
+        journal.job_added(other)
+        journal.job_removed(other)
+    journal.compact()
+
+    assert journal.compactions >= 2
+    assert len(path.read_text().splitlines()) == 2
+    restored = PlanJournal(path, sync=False)
+    assert restored.jobs == [job]
+    assert restored.outages == [future]
+
+
+def test_dispatcher_queue_is_journaled(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PlanJournal(path, sync=False)
+
+    def dispatcher(journal):
+        return PrintDispatcher(
+            None,
+            lambda: True,
+            lambda job: None,
+            lambda: None,
+            lambda: None,
+            journal=journal,
+        )
+
+    queue = dispatcher(journal)
+    queue.enqueue(PrintJob("printed", timedelta(hours=1), path="printed.gcode"))
+    queue.enqueue(PrintJob("waiting", timedelta(hours=1), path="waiting.gcode"))
+    queue.print_started("printed.gcode", DAY)
+    journal.close()
+
+    restored = dispatcher(PlanJournal(path, sync=False))
+
+    assert [job.name for job in restored.queued_jobs()] == ["waiting"]
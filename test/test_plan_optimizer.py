@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    PlacementEngine,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_optimizer import (
+    PlanOptimizer,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+from test.conftest import at, free_time
+
+
+def test_optimizer_fits_more_printing_time_than_greedy():
+    jobs = [
+        PrintJob("a", timedelta(hours=2)),
+        PrintJob("b", timedelta(hours=2)),
+        PrintJob("c", timedelta(hours=3)),
+        PrintJob("d", timedelta(hours=3)),
+    ]
+    free = free_time((0, 4), (5, 10))
+
+    greedy = PlacementEngine("first_fit").place(jobs, free)
+    optimized = PlanOptimizer(time_budget=5).optimize(jobs, free)
+
+    assert greedy.scheduled_time == timedelta(hours=7)
+    assert optimized.scheduled_time == timedelta(hours=8)
+    assert optimized.complete
+    assert optimized.remaining == free - DateIntervalSet(
+        p.interval for p in optimized.placements
+    )
+
+
+def test_optimizer_respects_deadlines_and_priorities():
+    jobs = [
+        PrintJob("late", timedelta(hours=2), deadline=at(3)),
+        PrintJob("cheap", timedelta(hours=3)),
+        PrintJob("urgent", timedelta(hours=2), priority=5),
+    ]
+    optimized = PlanOptimizer().optimize(jobs, free_time((0, 4)))
+
+    assert [p.job.name for p in optimized.placements] == ["late", "urgent"]
+    assert optimized.placements[0].interval.end <= at(3)
+    assert [j.name for j in optimized.unscheduled] == ["cheap"]
+
+
+def test_optimizer_returns_best_plan_when_budget_expires():
+    jobs = [PrintJob(str(i), timedelta(minutes=17 + 7 * i)) for i in range(40)]
+    free = free_time(*[(3 * i, 3 * i + 2) for i in range(20)])
+
+    optimized = PlanOptimizer(time_budget=0).optimize(jobs, free)
+
+    assert not optimized.complete
+    assert optimized.placements
+    assert len(optimized.placements) + len(optimized.unscheduled) == len(jobs)
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from octoprint_print_planning_scheduler.printing_schedule.planning_worker import (
+    PlanningWorker,
+)
+from test.conftest import wait_for
+
+
+def test_burst_of_requests_is_planned_once():
+    calls = []
+    worker = PlanningWorker(lambda: calls.append(1) or len(calls), debounce=0.05)
+    worker.start()
+    for _ in range(20):
+        worker.request()
+    wait_for(lambda: worker.latest is not None)
+    time.sleep(0.1)
+    worker.stop()
+
+    assert worker.requests == 20
+    assert len(calls) == 1
+    assert worker.latest.plan == 1
+    assert worker.latest.version == 1
+
+
+def test_continuous_requests_are_planned_after_max_delay():
+    worker = PlanningWorker(lambda: "plan", debounce=0.05, max_delay=0.1)
+    worker.start()
+    deadline = time.monotonic() + 0.5
+    while worker.latest is None and time.monotonic() < deadline:
+        worker.request()
+        time.sleep(0.01)
+    worker.stop()
+
+    assert worker.latest is not None
+
+
+def test_planning_runs_off_the_requesting_thread():
+    threads = []
+    published = []
+    worker = PlanningWorker(
+        lambda: threads.append(threading.current_thread()),
+        debounce=0,
+        on_publish=published.append,
+    )
+    worker.start()
+    worker.request()
+    wait_for(lambda: published)
+    worker.stop()
+
+    assert threads[0] is not threading.current_thread()
+    assert published[0] is worker.latest
+
+
+def test_failed_plan_keeps_previous_one():
+    results = iter(["first", None])
+
+    def plan():
+        result = next(results)
+        if result is None:
+            raise ValueError("calendar missing")
+        return result
+
+    worker = PlanningWorker(plan, debounce=0)
+    worker.start()
+    worker.request()
+    wait_for(lambda: worker.latest is not None)
+    worker.request()
+    wait_for(lambda: worker.requests == 2)
+    time.sleep(0.05)
+    worker.stop()
+
+    assert worker.latest.plan == "first"
+    assert worker.runs == 1
+
+
+def test_restored_plan_is_published_before_the_first_run():
+    published = []
+    worker = PlanningWorker(lambda: "new", debounce=0.01, on_publish=published.append)
+    worker.publish("restored")
+    worker.start()
+    worker.request()
+    wait_for(lambda: len(published) == 2)
+    worker.stop()
+
+    assert [(p.version, p.plan) for p in published] == [(1, "restored"), (2, "new")]
+    assert worker.runs == 1
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.placement import (
+    PlacementEngine,
+)
+from octoprint_print_planning_scheduler.printing_schedule.plan_api import (
+    ScheduleSnapshot,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_dispatcher import (
+    PrintDispatcher,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+
+
+class _Deadlines:
+    def __init__(self):
+        self.entries = {}
+
+    def schedule(self, key, when, callback):
+        self.entries[key] = (when, callback)
+
+    def cancel(self, key):
+        self.entries.pop(key, None)
+
+
+class _Printer:
+    def __init__(self):
+        self.ready = True
+        self.started = []
+        self.paused = 0
+
+    def start(self, job):
+        self.started.append(job.name)
+
+    def pause(self):
+        self.paused += 1
+
+
+def _dispatcher():
+    deadlines, printer, changes = _Deadlines(), _Printer(), []
+    dispatcher = PrintDispatcher(
+        deadlines,
+        is_ready=lambda: printer.ready,
+        start_print=printer.start,
+        pause_print=printer.pause,
+        on_change=lambda: changes.append(1),
+    )
+    return dispatcher, deadlines, printer, changes
+
+
+def _snapshot(jobs, power_hours, now):
+    power = DateIntervalSet(
+        DateInterval(now + timedelta(hours=s), now + timedelta(hours=e))
+        for s, e in power_hours
+    )
+    result = PlacementEngine().place(jobs, power)
+    return ScheduleSnapshot(result, power, now + timedelta(hours=24))
+
+
+def test_first_job_with_file_is_started_at_planned_time():
+    dispatcher, deadlines, printer, changes = _dispatcher()
+    now = datetime.now()
+    manual = PrintJob("manual", timedelta(hours=1))
+    part = PrintJob("part", timedelta(hours=1), path="part.gcode")
+    dispatcher.enqueue(manual)
+    dispatcher.enqueue(part)
+
+    dispatcher.plan_published(_snapshot([manual, part], [(0, 24)], now))
+    when, start = deadlines.entries["start"]
+    start()
+
+    assert when == now + timedelta(hours=1)
+    assert printer.started == ["part"]
+    assert len(changes) == 2
+
+
+def test_job_is_held_when_it_cannot_finish_before_outage():
+    dispatcher, deadlines, printer, changes = _dispatcher()
+    now = datetime.now()
+    job = PrintJob("part", timedelta(hours=2), path="part.gcode")
+
+    dispatcher.plan_published(_snapshot([], [(-1, 1)], now))
+    dispatcher._start(job)
+
+    assert not printer.started
+    assert dispatcher.holds == 1
+    assert changes
+
+
+def test_running_print_is_paused_before_outage():
+    dispatcher, deadlines, printer, changes = _dispatcher()
+    now = datetime.now()
+    job = PrintJob("part", timedelta(hours=3), path="part.gcode")
+    dispatcher.enqueue(job)
+    dispatcher.plan_published(_snapshot([job], [(0, 2), (4, 24)], now))
+
+    dispatcher.print_started("part.gcode", now)
+
+    assert dispatcher.running is job
+    assert not dispatcher.queued_jobs()
+    assert dispatcher.busy_interval(now) == DateInterval(now, now + timedelta(hours=3))
+    when, pause = deadlines.entries["pause"]
+    assert when == now + timedelta(hours=2) - dispatcher.pause_margin
+    pause()
+    assert printer.paused == 1
+
+    dispatcher.print_finished()
+    assert "pause" not in deadlines.entries
+    assert dispatcher.busy_interval(now) is None
+
+
+def test_new_outage_during_a_print_moves_the_pause():
+    dispatcher, deadlines, printer, changes = _dispatcher()
+    now = datetime.now()
+    job = PrintJob("part", timedelta(hours=3), path="part.gcode")
+    dispatcher.enqueue(job)
+    dispatcher.plan_published(_snapshot([job], [(0, 24)], now))
+    dispatcher.print_started("part.gcode", now)
+    assert "pause" not in deadlines.entries
+
+    # an urgent outage one hour from now, published while printing
+    dispatcher.plan_published(_snapshot([], [(0, 1), (2, 24)], now), now)
+    when, _ = deadlines.entries["pause"]
+    assert when == now + timedelta(hours=1) - dispatcher.pause_margin
+
+    # the outage is gone again in the next plan
+    dispatcher.plan_published(_snapshot([], [(0, 24)], now), now)
+    assert "pause" not in deadlines.entries
+
+
+def test_print_that_fits_is_not_paused():
+    dispatcher, deadlines, printer, changes = _dispatcher()
+    now = datetime.now()
+    job = PrintJob("part", timedelta(hours=1), path="part.gcode")
+    dispatcher.enqueue(job)
+    dispatcher.plan_published(_snapshot([job], [(0, 2), (4, 24)], now))
+
+    dispatcher.print_started("part.gcode", now)
+
+    assert "pause" not in deadlines.entries
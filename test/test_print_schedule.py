@@ -1,4 +1,10 @@
 from datetime import datetime, timedelta
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
 from octoprint_print_planning_scheduler.printing_schedule.print_schedule import (
     PrintSchedule,
 )
@@ -22,3 +28,16 @@ def test_new_schedule_allows_all_prints():
     # Scheduling jobs
     scheduled_jobs = scheduler.schedule_jobs()
     print("Scheduled Jobs:", scheduled_jobs)
+
+
+def test_urgent_outage_only_cuts_affected_power_interval(data_folder):
+    scheduler = PrintSchedule(data_folder / "minimal_calendar.ics")
+    power_before = scheduler.power_intervals.copy()
+    outage = DateInterval(
+        datetime.now() + timedelta(hours=2), datetime.now() + timedelta(hours=3)
+    )
+
+    scheduler.add_urgent_outage(outage.start, outage.end)
+
+    assert scheduler.power_intervals == power_before - DateIntervalSet([outage])
+    assert not scheduler.power_intervals.contains(outage.start + timedelta(minutes=30))
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from dateutil.rrule import DAILY, rrule
+
+from octoprint_print_planning_scheduler.printing_schedule.date_interval import (
+    DateInterval,
+)
+from octoprint_print_planning_scheduler.printing_schedule.date_interval_set import (
+    DateIntervalSet,
+)
+from octoprint_print_planning_scheduler.printing_schedule.incremental_planner import (
+    IncrementalPlanner,
+)
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    InfiniteCalendar,
+    RecurringEvent,
+    SingleEvent,
+)
+from octoprint_print_planning_scheduler.printing_schedule.print_job import PrintJob
+from octoprint_print_planning_scheduler.printing_schedule.rolling_horizon import (
+    HorizonTimer,
+    RollingHorizon,
+)
+from test.conftest import at, wait_for
+
+
+def _calendar():
+    # nightly outage from 23:00 to 01:00 crosses every midnight
+    night = at(23)
+    return InfiniteCalendar(
+        [
+            RecurringEvent(night, at(25), rrule(DAILY, dtstart=night)),
+            SingleEvent(at(30), at(31)),
+        ]
+    )
+
+
+def _full(calendar, start, end):
+    window = DateInterval(start, end)
+    return DateIntervalSet([window]).difference(
+        calendar.generate_intervals_for_period(
+            DateInterval(start - timedelta(days=1), end)
+        )
+    )
+
+
+def test_advance_matches_full_recompute():
+    calendar = _calendar()
+    horizon = RollingHorizon(calendar, timedelta(days=1))
+    horizon.reset(at(0))
+
+    for step in range(1, 80):
+        now = at(step * 0.75)
+        horizon.advance(now)
+        assert horizon.power_intervals == _full(calendar, now, now + horizon.length)
+
+
+def test_advance_returns_only_new_time():
+    horizon = RollingHorizon(_calendar(), timedelta(hours=20))
+    horizon.reset(at(0))
+
+    added = horizon.advance(at(6))
+
+    assert added == DateIntervalSet(
+        [DateInterval(at(20), at(23)), DateInterval(at(25), at(26))]
+    )
+    assert horizon.start == at(6)
+    assert horizon.end == at(26)
+
+
+def test_horizon_size_stays_constant():
+    horizon = RollingHorizon(_calendar(), timedelta(days=2))
+    horizon.reset(at(0))
+    sizes = set()
+    for step in range(1, 24 * 30):
+        horizon.advance(at(step))
+        sizes.add(len(horizon.power_intervals))
+    assert max(sizes) <= 4
+    assert len(horizon.calendar.expansion_cache._windows) <= 16
+
+
+def test_planner_follows_the_horizon():
+    horizon = RollingHorizon(_calendar(), timedelta(hours=20))
+    horizon.reset(at(0))
+    planner = IncrementalPlanner(horizon.power_intervals)
+    job_id = planner.add_job(PrintJob("long", timedelta(hours=5)))
+    planner.add_job(PrintJob("short", timedelta(hours=2)))
+    late_id = planner.add_job(PrintJob("late", timedelta(hours=14)))
+    assert late_id in planner.unscheduled
+
+    planner.job_finished(job_id, at(5))
+    planner.advance(at(6), horizon.advance(at(6)))
+
+    assert not planner.unscheduled
+    assert planner.placements[late_id].interval == DateInterval(at(7), at(21))
+
+
+def test_timer_advances_until_stopped():
+    calls = []
+    timer = HorizonTimer(lambda: calls.append(1), 0.01)
+    timer.start()
+    wait_for(lambda: len(calls) >= 3)
+    timer.stop()
+    count = len(calls)
+    assert count >= 3
+    assert len(calls) == count
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from dateutil.rrule import rrulestr
+from icalendar import vRecur
+
+from octoprint_print_planning_scheduler.printing_schedule.infinite_calendar import (
+    parse_recurrence,
+)
+from octoprint_print_planning_scheduler.printing_schedule.simple_recurrence import (
+    SimpleRecurrence,
+)
+
+DTSTART = datetime(2024, 7, 1, 10, 0)
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=DAILY",
+        "FREQ=DAILY;INTERVAL=3",
+        "FREQ=WEEKLY;INTERVAL=2",
+        "FREQ=HOURLY;INTERVAL=5;COUNT=40",
+        "FREQ=DAILY;UNTIL=20240720T100000",
+    ],
+)
+def test_simple_rule_matches_rrule(rule):
+    simple = SimpleRecurrence.from_rrule(DTSTART, vRecur.from_ical(rule))
+    general = rrulestr(rule, dtstart=DTSTART)
+    assert simple is not None
+
+    for after, before in [
+        (datetime(2024, 6, 1), datetime(2024, 7, 3)),
+        (datetime(2024, 7, 4, 10, 0), datetime(2024, 7, 25, 10, 0)),
+        (datetime(2024, 7, 10, 11, 0), datetime(2024, 8, 1)),
+    ]:
+        for inc in (True, False):
+            assert simple.between(after, before, inc=inc) == general.between(
+                after, before, inc=inc
+            )
+    assert list(simple.xafter(DTSTART, count=5)) == list(
+        general.xafter(DTSTART, count=5)
+    )
+
+
+def test_simple_rule_jumps_to_far_future_window():
+    simple = SimpleRecurrence.from_rrule(DTSTART, vRecur.from_ical("FREQ=MINUTELY"))
+    after = datetime(2124, 7, 1, 0, 0, 30)
+    assert simple.between(after, after + timedelta(minutes=2)) == [
+        datetime(2124, 7, 1, 0, 1),
+        datetime(2124, 7, 1, 0, 2),
+    ]
+
+
+def test_simple_rule_keeps_wall_time_across_dst():
+    tz = ZoneInfo("Europe/Kyiv")
+    dtstart = datetime(2024, 3, 25, 10, 0, tzinfo=tz)
+    simple = SimpleRecurrence.from_rrule(dtstart, vRecur.from_ical("FREQ=DAILY"))
+    general = rrulestr("FREQ=DAILY", dtstart=dtstart)
+    after = datetime(2024, 3, 29, 12, 0, tzinfo=tz)
+    before = datetime(2024, 4, 3, 12, 0, tzinfo=tz)
+    assert simple.between(after, before) == general.between(after, before)
+
+
+def test_complex_rules_fall_back_to_rrule():
+    recurrence = parse_recurrence(DTSTART, vRecur.from_ical("FREQ=WEEKLY;BYDAY=MO,TU"))
+    assert not isinstance(recurrence, SimpleRecurrence)
+    assert recurrence.between(datetime(2024, 7, 1), datetime(2024, 7, 9)) == [
+        datetime(2024, 7, 1, 10, 0),
+        datetime(2024, 7, 2, 10, 0),
+        datetime(2024, 7, 8, 10, 0),
+    ]